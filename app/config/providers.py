@@ -2,12 +2,7 @@
 Provider configuration module for the OAuth API service.
 """
 from enum import Enum
-from typing import Dict, List, Set, Type
-
-# Import provider service classes once created
-from app.services.providers.sketchfab import SketchfabOAuthService
-from app.services.providers.google import GoogleOAuthService
-from app.services.providers.twitter import TwitterOAuthService
+from typing import Dict, FrozenSet, Tuple
 
 
 class OAuthProvider(str, Enum):
@@ -20,23 +15,38 @@ class OAuthProvider(str, Enum):
     # Add more providers here as needed
 
 
-# Register provider service classes
-PROVIDER_SERVICES: Dict[str, Type] = {
-    OAuthProvider.SKETCHFAB: SketchfabOAuthService,
-    OAuthProvider.GOOGLE: GoogleOAuthService,
-    OAuthProvider.TWITTER: TwitterOAuthService,
+# Provider names are fixed for the process lifetime, so resolve them once
+_SUPPORTED_PROVIDER_NAMES: Tuple[str, ...] = tuple(provider.value for provider in OAuthProvider)
+_SUPPORTED_PROVIDERS: FrozenSet[str] = frozenset(_SUPPORTED_PROVIDER_NAMES)
+
+# Length bounds let obviously invalid names (scanners, fuzzing) fail without hashing
+_MIN_PROVIDER_LEN: int = min(len(provider) for provider in _SUPPORTED_PROVIDER_NAMES)
+_MAX_PROVIDER_LEN: int = max(len(provider) for provider in _SUPPORTED_PROVIDER_NAMES)
+
+
+# Register provider service classes as "module:ClassName" import paths; the
+# modules are imported on first use so unused providers cost nothing at startup
+PROVIDER_SERVICES: Dict[str, str] = {
+    OAuthProvider.SKETCHFAB: "app.services.providers.sketchfab:SketchfabOAuthService",
+    OAuthProvider.GOOGLE: "app.services.providers.google:GoogleOAuthService",
+    OAuthProvider.TWITTER: "app.services.providers.twitter:TwitterOAuthService",
     # Add more providers here as needed
 }
 
+# Ordinal of each provider in OAuthProvider, and an immutable table of service
+# class import paths indexed by that ordinal
+PROVIDER_ORDINAL: Dict[str, int] = {provider.value: ordinal for ordinal, provider in enumerate(OAuthProvider)}
+PROVIDER_SERVICE_TABLE: Tuple[str, ...] = tuple(PROVIDER_SERVICES[provider] for provider in OAuthProvider)
+
 
-def get_supported_providers() -> List[str]:
+def get_supported_providers() -> Tuple[str, ...]:
     """
-    Get list of supported OAuth providers.
+    Get the supported OAuth providers.
     
     Returns:
-        List[str]: List of supported provider names.
+        Tuple[str, ...]: Supported provider names, in declaration order.
     """
-    return [provider.value for provider in OAuthProvider]
+    return _SUPPORTED_PROVIDER_NAMES
 
 
 def is_provider_supported(provider: str) -> bool:
@@ -49,4 +59,4 @@ def is_provider_supported(provider: str) -> bool:
     Returns:
         bool: True if the provider is supported, False otherwise.
     """
-    return provider in get_supported_providers() 
\ No newline at end of file
+    return _MIN_PROVIDER_LEN <= len(provider) <= _MAX_PROVIDER_LEN and provider in _SUPPORTED_PROVIDERS 
\ No newline at end of file
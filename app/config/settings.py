@@ -1,15 +1,10 @@
 """
 Settings module for loading and validating environment variables.
 """
-import os
 from functools import lru_cache
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
-
-# Load environment variables from .env file if it exists
-load_dotenv()
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -17,36 +12,56 @@ class Settings(BaseSettings):
     Settings class for the OAuth API service.
     """
     # AWS Configuration
-    aws_region: str = os.getenv("AWS_REGION", "us-east-1")
-    stage: str = os.getenv("STAGE", "dev")
+    aws_region: str = "us-east-1"
+    stage: str = "dev"
     
     # Development mode flag - set to True to skip database operations
-    dev_mode: bool = os.getenv("DEV_MODE", "false").lower() == "true"
+    dev_mode: bool = False
+    
+    # Secret used to sign session cookies; required outside the dev stage so
+    # sessions survive restarts and cold starts
+    session_secret_key: str = ""
 
     # Sketchfab OAuth configuration
-    sketchfab_client_id: str = os.getenv("SKETCHFAB_CLIENT_ID", "")
-    sketchfab_client_secret: str = os.getenv("SKETCHFAB_CLIENT_SECRET", "")
-    sketchfab_redirect_uri: str = os.getenv("SKETCHFAB_REDIRECT_URI", "")
+    sketchfab_client_id: str = ""
+    sketchfab_client_secret: str = ""
+    sketchfab_redirect_uri: str = ""
     
     # Google OAuth configuration
-    google_client_id: str = os.getenv("GOOGLE_CLIENT_ID", "")
-    google_client_secret: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
-    google_redirect_uri: str = os.getenv("GOOGLE_REDIRECT_URI", "")
+    google_client_id: str = ""
+    google_client_secret: str = ""
+    google_redirect_uri: str = ""
     
     # Twitter OAuth configuration
-    twitter_client_id: str = os.getenv("TWITTER_CLIENT_ID", "")
-    twitter_client_secret: str = os.getenv("TWITTER_CLIENT_SECRET", "")
-    twitter_redirect_uri: str = os.getenv("TWITTER_REDIRECT_URI", "")
+    twitter_client_id: str = ""
+    twitter_client_secret: str = ""
+    twitter_redirect_uri: str = ""
+    
+    # Outbound calls allowed per provider per 15-minute window, the unit
+    # providers publish their quotas in (0 disables client-side throttling)
+    sketchfab_rate_limit: int = 0
+    google_rate_limit: int = 0
+    twitter_rate_limit: int = 0
+    
+    # Seconds to reuse a provider's user information for the same access token
+    user_info_cache_ttl: int = 300
+    
+    # Seconds to keep the last known user information as a fallback for provider outages
+    user_info_stale_ttl: int = 86400
+    
+    # Origins allowed to make cross-origin requests (JSON list in CORS_ALLOW_ORIGINS)
+    cors_allow_origins: List[str] = ["*"]
     
     # Base URLs for API endpoints
     api_base_path: str = "/api/oauth"
 
-    class Config:
-        """
-        Pydantic configuration.
-        """
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # Field names map case-insensitively to environment variables (e.g. STAGE,
+    # SKETCHFAB_CLIENT_ID); values from .env are read by pydantic-settings itself
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"
+    )
 
 
 @lru_cache
@@ -60,47 +75,68 @@ def get_settings() -> Settings:
     return Settings()
 
 
+# Static endpoint configuration for each provider
+_STATIC_URLS: Dict[str, Dict[str, str]] = {
+    "sketchfab": {
+        "authorize_url": "https://sketchfab.com/oauth2/authorize/",
+        "token_url": "https://sketchfab.com/oauth2/token/",
+        "api_base_url": "https://sketchfab.com/v2/",
+    },
+    "google": {
+        "authorize_url": "https://accounts.google.com/o/oauth2/v2/auth",
+        "token_url": "https://oauth2.googleapis.com/token",
+        "api_base_url": "https://www.googleapis.com/oauth2/v1/",
+    },
+    "twitter": {
+        "authorize_url": "https://twitter.com/i/oauth2/authorize",
+        "token_url": "https://api.twitter.com/2/oauth2/token",
+        "api_base_url": "https://api.twitter.com/2/users/me",
+        "scopes": "tweet.read users.read offline.access",
+    },
+    # Add more providers here
+}
+
+# Settings attributes holding (client_id, client_secret, redirect_uri) for each provider
+_CRED_FIELDS: Dict[str, Tuple[str, str, str]] = {
+    "sketchfab": ("sketchfab_client_id", "sketchfab_client_secret", "sketchfab_redirect_uri"),
+    "google": ("google_client_id", "google_client_secret", "google_redirect_uri"),
+    "twitter": ("twitter_client_id", "twitter_client_secret", "twitter_redirect_uri"),
+}
+
+# Resolved configuration per provider, filled on first use
+_CONFIG_CACHE: Dict[str, Dict[str, str]] = {}
+
+
 def get_oauth_config(provider: str) -> Dict[str, str]:
     """
     Get OAuth configuration for a specific provider.
     
+    Settings are immutable once loaded, so the configuration is resolved on the
+    first call and the same dict is returned afterwards. Callers must treat it
+    as read-only.
+    
     Args:
         provider: The OAuth provider name.
         
     Returns:
         Dict[str, str]: OAuth configuration for the provider.
     """
-    settings = get_settings()
+    config = _CONFIG_CACHE.get(provider)
+    if config is not None:
+        return config
     
-    if provider == "sketchfab":
-        return {
-            "client_id": settings.sketchfab_client_id,
-            "client_secret": settings.sketchfab_client_secret,
-            "redirect_uri": settings.sketchfab_redirect_uri,
-            "authorize_url": "https://sketchfab.com/oauth2/authorize/",
-            "token_url": "https://sketchfab.com/oauth2/token/",
-            "api_base_url": "https://sketchfab.com/v2/",
-        }
+    urls = _STATIC_URLS.get(provider)
+    if urls is None:
+        raise ValueError(f"Unsupported provider: {provider}")
     
-    # Add more providers here
-    elif provider == "google":
-        return {
-            "client_id": settings.google_client_id,
-            "client_secret": settings.google_client_secret,
-            "redirect_uri": settings.google_redirect_uri,
-            "authorize_url": "https://accounts.google.com/o/oauth2/v2/auth",
-            "token_url": "https://oauth2.googleapis.com/token",
-            "api_base_url": "https://www.googleapis.com/oauth2/v1/",
-        }
-    elif provider == "twitter":
-        return {
-            "client_id": settings.twitter_client_id,
-            "client_secret": settings.twitter_client_secret,
-            "redirect_uri": settings.twitter_redirect_uri,
-            "authorize_url": "https://twitter.com/i/oauth2/authorize",
-            "token_url": "https://api.twitter.com/2/oauth2/token",
-            "api_base_url": "https://api.twitter.com/2/users/me",
-            "scopes": "tweet.read users.read offline.access",
-        }
+    settings = get_settings()
+    client_id_field, client_secret_field, redirect_uri_field = _CRED_FIELDS[provider]
     
-    raise ValueError(f"Unsupported provider: {provider}") 
\ No newline at end of file
+    config = {
+        "client_id": getattr(settings, client_id_field),
+        "client_secret": getattr(settings, client_secret_field),
+        "redirect_uri": getattr(settings, redirect_uri_field),
+        **urls,
+    }
+    _CONFIG_CACHE[provider] = config
+    return config
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Shared HTTP client for calls to the OAuth providers.
+"""
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizing: one pool per provider host, each large enough for
+# FastAPI's threadpool to run provider calls concurrently
+POOL_CONNECTIONS: int = 8
+POOL_MAXSIZE: int = 32
+
+# Transient provider failures are retried on the pooled connection with backoff.
+# Only GETs are resent after reaching the provider: token endpoint POSTs carry
+# single-use authorization codes and rotating refresh tokens, so a POST is only
+# retried when the connection itself could not be made.
+MAX_RETRIES: int = 3
+RETRY_BACKOFF: float = 0.25
+RETRY_STATUSES: Tuple[int, ...] = (429, 502, 503, 504)
+
+# Shared sessions, keyed by whether they only retry connection failures
+_sessions: Dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+def _build_session(connect_retries_only: bool) -> requests.Session:
+    """
+    Build a session with pooling and retries configured.
+    
+    Args:
+        connect_retries_only: Only retry requests that never reached the
+            provider, so every request the provider sees is one the caller made.
+            
+    Returns:
+        requests.Session: The new HTTP session.
+    """
+    session = requests.Session()
+    
+    # The session is shared between users, so never keep provider cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    
+    retry = Retry(
+        total=MAX_RETRIES,
+        read=False if connect_retries_only else None,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=None if connect_retries_only else RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        # Retry-After can ask for hours; don't sleep a worker thread on it
+        respect_retry_after_header=False,
+        # Hand the last response back so providers report the error as usual
+        # instead of raising RetryError
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session(connect_retries_only: bool = False) -> requests.Session:
+    """
+    Get an HTTP session shared by the provider services, creating it on first use.
+    
+    Args:
+        connect_retries_only: Get the session that never retries a request the
+            provider has seen, for callers that count their provider calls.
+            
+    Returns:
+        requests.Session: The shared HTTP session.
+    """
+    session = _sessions.get(connect_retries_only)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(connect_retries_only)
+            if session is None:
+                session = _sessions[connect_retries_only] = _build_session(connect_retries_only)
+    return session
+
+
+def close_http_session() -> None:
+    """
+    Close the shared HTTP sessions and their pooled connections.
+    """
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
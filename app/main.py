@@ -3,47 +3,77 @@ Main application module for the OAuth API service.
 """
 import os
 import logging
+from contextlib import asynccontextmanager
 from typing import Dict
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from mangum import Mangum
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.config.settings import get_settings
+from app.http_client import close_http_session
 from app.routers import oauth
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# Configure logging, unless the host (e.g. the Lambda runtime or a test
+# runner) has already installed root handlers
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.StreamHandler()
+        ]
+    )
 logger = logging.getLogger(__name__)
 
+# Settings are fixed for the process lifetime; read them once at import
+settings = get_settings()
+_STAGE: str = settings.stage
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan handler.
+    
+    Args:
+        app: The FastAPI application.
+    """
+    yield
+    # Release pooled provider connections on shutdown
+    close_http_session()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Secure MCP OAuth API",
     description="OAuth API service for multiple providers",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.cors_allow_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Sessions carry pending PKCE verifiers, so every worker of a deployed stage
+# must sign them with the same configured key
+if not settings.session_secret_key and _STAGE != "dev":
+    raise RuntimeError(f"SESSION_SECRET_KEY must be set for the {_STAGE} stage")
+
 # Add session middleware
 app.add_middleware(
     SessionMiddleware,
-    secret_key=os.urandom(24),  # Generate a random secret key
+    # Random fallback is for local development only; it changes on every restart
+    secret_key=settings.session_secret_key or os.urandom(24),
     session_cookie="oauth_session",
     max_age=3600  # 1 hour
 )
@@ -51,6 +81,16 @@ app.add_middleware(
 # Add routers
 app.include_router(oauth.router)
 
+# Static response bodies, computed once since settings do not change at runtime
+_ROOT_BODY: Dict = {
+    "name": "Secure MCP OAuth API",
+    "version": "0.1.0",
+    "description": "OAuth API service for multiple providers",
+    "docs_url": "/docs",
+    "environment": _STAGE
+}
+_HEALTH_BODY_BYTES: bytes = b'{"status":"healthy"}'
+
 
 @app.get("/")
 async def root():
@@ -60,14 +100,7 @@ async def root():
     Returns:
         Dict: Service information.
     """
-    settings = get_settings()
-    return {
-        "name": "Secure MCP OAuth API",
-        "version": "0.1.0",
-        "description": "OAuth API service for multiple providers",
-        "docs_url": "/docs",
-        "environment": settings.stage
-    }
+    return _ROOT_BODY
 
 
 @app.get("/health")
@@ -76,11 +109,10 @@ async def health():
     Health check endpoint.
     
     Returns:
-        Dict: Health status.
+        Response: Health status.
     """
-    return {
-        "status": "healthy"
-    }
+    # Health checks are the highest-volume endpoint, so skip serialization
+    return Response(content=_HEALTH_BODY_BYTES, media_type="application/json")
 
 
 @app.exception_handler(Exception)
@@ -95,7 +127,9 @@ async def global_exception_handler(request: Request, exc: Exception):
     Returns:
         JSONResponse: Error response.
     """
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+    # Traceback formatting is costly, so only do it when the record will be emitted
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error("Unhandled exception: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=500,
         content={
@@ -105,5 +139,6 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
-# Create Mangum handler for AWS Lambda
-handler = Mangum(app) 
\ No newline at end of file
+# Create Mangum handler for AWS Lambda (Lambda freezes containers instead of
+# shutting them down, so skip the ASGI lifespan cycle on each invocation)
+handler = Mangum(app, lifespan="off") 
\ No newline at end of file
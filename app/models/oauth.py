@@ -17,16 +17,18 @@ class OAuthToken(BaseModel):
     refresh_token: Optional[str] = None
     scope: Optional[str] = None
     expires_at: Optional[int] = None  # Unix timestamp for TTL
+    refresh_at: Optional[int] = None  # Unix timestamp after which the token is refreshed
 
     def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
         """
-        Convert model to dictionary.
+        Convert model to dictionary, omitting fields that are None.
         
         Returns:
             Dict: Dictionary representation of the model.
         """
-        # Filter out None values
-        return {k: v for k, v in super().model_dump(**kwargs).items() if v is not None}
+        # Let pydantic-core drop None values during serialization
+        kwargs.setdefault("exclude_none", True)
+        return super().model_dump(**kwargs)
 
 
 class OAuthTokenResponse(BaseModel):
@@ -65,4 +67,24 @@ class UserInfo(BaseModel):
     email: Optional[str] = None
     profile_url: Optional[str] = None
     avatar_url: Optional[str] = None
-    raw_data: Dict = Field(default_factory=dict) 
\ No newline at end of file
+    raw_data: Dict = Field(default_factory=dict)
+
+
+class CallbackUserInfo(BaseModel):
+    """
+    Public user information returned by the OAuth callback.
+    """
+    id: str
+    username: str
+    email: Optional[str] = None
+    profile_url: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+
+class OAuthCallbackResponse(BaseModel):
+    """
+    OAuth callback response model for API responses.
+    """
+    success: bool = True
+    user_info: CallbackUserInfo
+    token_info: OAuthTokenResponse
@@ -1,16 +1,27 @@
 """
 OAuth router module for the API service.
 """
+import functools
+import inspect
 import logging
-from typing import Dict, Optional
+import time
+from typing import Callable, Dict, MutableMapping, Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response
 
-from app.config.providers import get_supported_providers
+from app.config.providers import get_supported_providers, is_provider_supported
 from app.config.settings import get_settings
-from app.models.oauth import OAuthRefreshRequest, OAuthTokenResponse, UserInfo
-from app.services.oauth_factory import create_oauth_service
+from app.models.oauth import (
+    CallbackUserInfo,
+    OAuthCallbackResponse,
+    OAuthRefreshRequest,
+    OAuthTokenResponse,
+    UserInfo
+)
+from app.services.oauth_base import BaseOAuthService
+from app.services.oauth_factory import create_oauth_service, unsupported_provider_error
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -18,41 +29,124 @@ logger = logging.getLogger(__name__)
 # Define which providers require PKCE
 PKCE_PROVIDERS = ["twitter"]
 
-router = APIRouter(prefix="/api/oauth")
+# Pending PKCE flows are kept in the signed session cookie, keyed by state, so
+# the callback can be served by any worker: each for at most PKCE_FLOW_TTL
+# seconds, and only the newest PKCE_MAX_PENDING_FLOWS to bound the cookie size
+PKCE_SESSION_KEY = "pkce"
+PKCE_FLOW_TTL = 600
+PKCE_MAX_PENDING_FLOWS = 5
 
+# Handlers that call provider APIs are plain functions: the service layer does
+# blocking HTTP, so FastAPI runs them in its threadpool instead of on the event loop
+router = APIRouter(prefix="/api/oauth", default_response_class=ORJSONResponse)
 
-@router.get("/authorize/{provider}")
-async def authorize(provider: str, request: Request):
+# The provider list is fixed for the process lifetime, so encode it once
+_PROVIDERS_RESPONSE: Dict = {"providers": list(get_supported_providers())}
+_PROVIDERS_RESPONSE_BYTES: bytes = orjson.dumps(_PROVIDERS_RESPONSE)
+
+
+def _token_preview(value: Optional[str]) -> Optional[str]:
     """
-    Initiate the OAuth flow by redirecting to the provider's authorization page.
+    Truncate a token for debug logging.
+    
+    Args:
+        value: The token to truncate.
+        
+    Returns:
+        Optional[str]: The first ten characters followed by "...", or None.
+    """
+    return value[:10] + "..." if value else None
+
+
+def _save_code_verifier(session: MutableMapping, state: str, code_verifier: str) -> None:
+    """
+    Keep a PKCE code verifier in the session until the flow's callback.
+    
+    Args:
+        session: The request session.
+        state: The state parameter of the flow.
+        code_verifier: The flow's code verifier.
+    """
+    now = int(time.time())
+    pending = {
+        flow_state: flow
+        for flow_state, flow in session.get(PKCE_SESSION_KEY, {}).items()
+        if flow[1] > now
+    }
+    pending[state] = [code_verifier, now + PKCE_FLOW_TTL]
+    session[PKCE_SESSION_KEY] = dict(list(pending.items())[-PKCE_MAX_PENDING_FLOWS:])
+
+
+def _pop_code_verifier(session: MutableMapping, state: str) -> Optional[str]:
+    """
+    Take the PKCE code verifier of a flow out of the session.
+    
+    Each verifier can only be taken once.
+    
+    Args:
+        session: The request session.
+        state: The state parameter from the callback.
+        
+    Returns:
+        Optional[str]: The code verifier, or None if the flow is unknown or expired.
+    """
+    pending = session.get(PKCE_SESSION_KEY)
+    if not pending or state not in pending:
+        return None
+    
+    code_verifier, expires_at = pending.pop(state)
+    session[PKCE_SESSION_KEY] = pending
+    return code_verifier if expires_at > time.time() else None
+
+
+async def get_oauth_service(provider: str) -> BaseOAuthService:
+    """
+    Resolve the provider path parameter to its OAuth service.
+    
+    Declared async because it does no blocking work, so FastAPI resolves it
+    inline rather than in the threadpool.
     
     Args:
         provider: The OAuth provider.
+        
+    Returns:
+        BaseOAuthService: The cached service for the provider.
+        
+    Raises:
+        HTTPException: If the provider is not supported.
+    """
+    if not is_provider_supported(provider):
+        logger.warning(f"Unsupported provider requested: {provider}")
+        raise unsupported_provider_error(provider)
+    
+    return create_oauth_service(provider)
+
+
+def authorize(request: Request, service: BaseOAuthService = Depends(get_oauth_service)):
+    """
+    Initiate the OAuth flow by redirecting to the provider's authorization page.
+    
+    Args:
         request: The FastAPI request object.
+        service: The OAuth service for the requested provider.
         
     Returns:
         RedirectResponse: Redirect to the provider's authorization page.
     """
+    provider = service.provider
     logger.info(f"Initiating OAuth flow for provider: {provider}")
     
-    if provider not in get_supported_providers():
-        logger.warning(f"Unsupported provider requested: {provider}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported provider: {provider}"
-        )
-    
-    service = create_oauth_service(provider)
-    authorization_url = service.get_authorization_url()
+    authorization_url, state, code_verifier = service.start_authorization()
+    if code_verifier:
+        _save_code_verifier(request.session, state, code_verifier)
     
     logger.info(f"Redirecting to {provider} authorization URL")
     return RedirectResponse(authorization_url)
 
 
-@router.get("/callback/{provider}")
-async def callback(
-    provider: str,
+def callback(
     request: Request,
+    service: BaseOAuthService = Depends(get_oauth_service),
     code: str = Query(...),
     state: Optional[str] = Query(None),
     code_verifier: Optional[str] = Query(None),
@@ -63,8 +157,8 @@ async def callback(
     Handle the OAuth callback from the provider.
     
     Args:
-        provider: The OAuth provider.
         request: The FastAPI request object.
+        service: The OAuth service for the requested provider.
         code: The authorization code.
         state: Optional state parameter from the provider.
         code_verifier: Optional PKCE code verifier.
@@ -72,17 +166,20 @@ async def callback(
         error_description: Optional error description from the provider.
         
     Returns:
-        Dict: The OAuth token response.
+        Response: The OAuth token response.
     """
+    provider = service.provider
     logger.info(f"Handling OAuth callback for provider: {provider}")
-    logger.debug(f"Callback query params: code={code[:5]}***")
-    logger.debug(f"Request headers: {dict(request.headers)}")
-    
-    # Log optional parameters if they exist
-    if state:
-        logger.debug(f"State parameter present: {state[:5]}***")
-    if code_verifier:
-        logger.debug(f"Code verifier present: {code_verifier[:5]}***")
+    # Only slice the secrets for previews when debug output is enabled
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Callback query params: code=%s***", code[:5])
+        logger.debug("Request headers: %s", request.headers)
+        
+        # Log optional parameters if they exist
+        if state:
+            logger.debug("State parameter present: %s***", state[:5])
+        if code_verifier:
+            logger.debug("Code verifier present: %s***", code_verifier[:5])
     
     if error:
         logger.error(f"OAuth error from provider: {error}, description: {error_description}")
@@ -94,15 +191,9 @@ async def callback(
             }
         )
     
-    if provider not in get_supported_providers():
-        logger.warning(f"Unsupported provider in callback: {provider}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported provider: {provider}"
-        )
-    
-    logger.info(f"Creating OAuth service for provider: {provider}")
-    service = create_oauth_service(provider)
+    # PKCE providers get the flow's code verifier back from the session
+    if not code_verifier and state and provider in PKCE_PROVIDERS:
+        code_verifier = _pop_code_verifier(request.session, state)
     
     try:
         # Exchange the authorization code for an access token
@@ -111,16 +202,10 @@ async def callback(
         
         # For Google, skip user info retrieval and just return the tokens
         if provider == "google":
-            return {
-                "access_token": token.access_token,
-                "token_type": token.token_type,
-                "expires_in": token.expires_in,
-                "refresh_token": token.refresh_token,
-                "scope": token.scope
-            }
+            return Response(content=token.model_dump_json(), media_type="application/json")
         
         # Get user information using the access token
-        user_info = service.get_user_info(token.access_token)
+        user_info = service.get_user_info_cached(token.access_token)
         logger.info(f"Successfully retrieved user info for provider: {provider}")
         
         # Store the token with the user's provider ID
@@ -129,44 +214,24 @@ async def callback(
         
         logger.info(f"OAuth flow successfully completed for user: {user_info.username}")
         
-        # Prepare sanitized response data for logging (without full tokens)
-        log_response = {
-            "success": True,
-            "user_info": {
-                "id": user_info.id,
-                "username": user_info.username,
-                "email": user_info.email,
-                "profile_url": user_info.profile_url,
-                "avatar_url": user_info.avatar_url
-            },
-            "token_info": {
-                "access_token": f"{token.access_token[:10]}..." if token.access_token else None,
-                "token_type": token.token_type,
-                "expires_in": token.expires_in,
-                "refresh_token": f"{token.refresh_token[:10]}..." if token.refresh_token else None,
-                "scope": token.scope
-            }
-        }
-        logger.debug(f"Callback response data: {log_response}")
+        # Copy the public user fields in a single pydantic-core pass
+        response = OAuthCallbackResponse(
+            user_info=CallbackUserInfo.model_validate(user_info, from_attributes=True),
+            token_info=token
+        )
         
-        # Return the actual data without truncated tokens
-        return {
-            "success": True,
-            "user_info": {
-                "id": user_info.id,
-                "username": user_info.username,
-                "email": user_info.email,
-                "profile_url": user_info.profile_url,
-                "avatar_url": user_info.avatar_url
-            },
-            "token_info": {
-                "access_token": token.access_token,
-                "token_type": token.token_type,
-                "expires_in": token.expires_in,
-                "refresh_token": token.refresh_token,
-                "scope": token.scope
-            }
-        }
+        # Log a sanitized copy of the response (without full tokens) only when
+        # debug output is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            log_response = response.model_dump()
+            token_info = log_response["token_info"]
+            token_info["access_token"] = _token_preview(token.access_token)
+            token_info["refresh_token"] = _token_preview(token.refresh_token)
+            logger.debug("Callback response data: %s", log_response)
+        
+        # Return the actual data without truncated tokens, serialized straight
+        # to JSON bytes by pydantic-core
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Exception during OAuth callback: {str(e)}", exc_info=True)
@@ -176,37 +241,30 @@ async def callback(
         )
 
 
-@router.post("/refresh/{provider}")
-async def refresh_token(
-    provider: str,
-    refresh_request: OAuthRefreshRequest
+def refresh_token(
+    refresh_request: OAuthRefreshRequest,
+    service: BaseOAuthService = Depends(get_oauth_service)
 ):
     """
     Refresh an OAuth access token.
     
     Args:
-        provider: The OAuth provider.
         refresh_request: The refresh token request.
+        service: The OAuth service for the requested provider.
         
     Returns:
         Dict: The new OAuth token response.
     """
-    service = create_oauth_service(provider)
     
-    # Check if the user has a token for this provider
-    existing_token = service.get_token(refresh_request.user_id)
-    if not existing_token:
+    # Refresh and store the user's token; the refresh token must match the
+    # one stored for the user
+    token = service.refresh_stored_token(refresh_request.user_id, refresh_request.refresh_token)
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No token found for user {refresh_request.user_id} and provider {provider}"
+            detail=f"No token found for user {refresh_request.user_id} and provider {service.provider}"
         )
     
-    # Refresh the token
-    token = service.refresh_token(refresh_request.refresh_token)
-    
-    # Store the new token
-    service.store_token(refresh_request.user_id, token)
-    
     return {
         "success": True,
         "access_token": token.access_token,
@@ -217,45 +275,97 @@ async def refresh_token(
     }
 
 
-@router.get("/me/{provider}")
-async def get_user_info(
-    provider: str,
-    user_id: str
+def get_user_info(
+    user_id: str,
+    service: BaseOAuthService = Depends(get_oauth_service)
 ):
     """
     Get user information from the OAuth provider.
     
     Args:
-        provider: The OAuth provider.
         user_id: The user ID.
+        service: The OAuth service for the requested provider.
         
     Returns:
         UserInfo: The user information.
     """
-    service = create_oauth_service(provider)
     
     # Get the user's token
     token = service.get_token(user_id)
     if not token:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No token found for user {user_id} and provider {provider}"
+            detail=f"No token found for user {user_id} and provider {service.provider}"
         )
     
     # Get the user information
-    user_info = service.get_user_info(token.access_token)
+    user_info = service.get_user_info_cached(token.access_token)
     
     return user_info
 
 
+def _bind_service(endpoint: Callable, provider: str) -> Callable:
+    """
+    Build a copy of a provider endpoint with its provider fixed.
+    
+    The copy's signature swaps the ``service`` dependency for one that resolves
+    the given provider's service, so FastAPI no longer needs a provider path
+    parameter. The service (and its provider module) is only created by the
+    first request.
+    
+    Args:
+        endpoint: The provider endpoint to bind.
+        provider: The OAuth provider to inject the service of.
+        
+    Returns:
+        Callable: The bound endpoint.
+    """
+    async def get_bound_service() -> BaseOAuthService:
+        return create_oauth_service(provider)
+    
+    @functools.wraps(endpoint)
+    def bound_endpoint(*args, **kwargs):
+        return endpoint(*args, **kwargs)
+    
+    signature = inspect.signature(endpoint)
+    bound_endpoint.__signature__ = signature.replace(parameters=[
+        param.replace(default=Depends(get_bound_service)) if param.name == "service" else param
+        for param in signature.parameters.values()
+    ])
+    return bound_endpoint
+
+
+# Routes that take a provider: (path prefix, endpoint, HTTP method)
+_PROVIDER_ROUTES = (
+    ("/authorize", authorize, "GET"),
+    ("/callback", callback, "GET"),
+    ("/refresh", refresh_token, "POST"),
+    ("/me", get_user_info, "GET"),
+)
+
+# Register a static route per supported provider first so requests for known
+# providers match without validating the path parameter. The generic
+# {provider} routes come after them, documenting the API and rejecting
+# unsupported providers.
+for _provider in get_supported_providers():
+    for _prefix, _endpoint, _method in _PROVIDER_ROUTES:
+        router.add_api_route(
+            f"{_prefix}/{_provider}",
+            _bind_service(_endpoint, _provider),
+            methods=[_method],
+            include_in_schema=False
+        )
+
+for _prefix, _endpoint, _method in _PROVIDER_ROUTES:
+    router.add_api_route(f"{_prefix}/{{provider}}", _endpoint, methods=[_method])
+
+
 @router.get("/providers")
 async def get_providers():
     """
     Get the list of supported OAuth providers.
     
     Returns:
-        Dict: The list of supported providers.
+        Response: The list of supported providers.
     """
-    return {
-        "providers": get_supported_providers()
-    } 
\ No newline at end of file
+    return Response(content=_PROVIDERS_RESPONSE_BYTES, media_type="application/json") 
\ No newline at end of file
@@ -1,15 +1,28 @@
 """
 Base OAuth service for provider-specific implementations.
 """
+import hashlib
+import hmac
+import logging
+import math
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Tuple, Union
+from concurrent.futures import Future
+from typing import Any, ClassVar, Dict, Optional, Tuple, Union
 
+import orjson
 import requests
+from cachetools import TLRUCache, TTLCache
 from fastapi import HTTPException, status
 
 from app.config.settings import get_settings
+from app.http_client import get_http_session
 from app.models.oauth import OAuthToken, OAuthTokenResponse, UserInfo
+from app.utils.rate_limit import TokenBucket
+
+# Configure logger
+logger = logging.getLogger(__name__)
 
 
 class BaseOAuthService(ABC):
@@ -17,6 +30,50 @@ class BaseOAuthService(ABC):
     Base OAuth service with common functionality.
     """
     
+    # Services are long-lived singletons with a fixed set of attributes
+    __slots__ = (
+        "provider",
+        "settings",
+        "_tokens",
+        "_user_info_cache",
+        "_user_info_cache_lock",
+        "_user_info_stale",
+        "_refresh_inflight",
+        "_refresh_results",
+        "_refresh_lock",
+        "_rate_limiter",
+    )
+    
+    # (connect, read) timeout in seconds for one attempt of a provider call.
+    # The read timeout bounds each wait for data on the socket, not the whole
+    # response, so this is only a rough bound per attempt. A call can take
+    # several attempts (MAX_RETRIES and RETRY_BACKOFF in app.http_client; token
+    # POSTs only retry connecting) plus a rate-limit wait of RATE_LIMIT_MAX_WAIT
+    HTTP_TIMEOUT: ClassVar[Tuple[float, float]] = (3.05, 10)
+    
+    # Maximum number of access tokens with cached user information; the TTL
+    # comes from settings.user_info_cache_ttl
+    USER_INFO_CACHE_SIZE: ClassVar[int] = 10_000
+    
+    # Provider statuses treated as a transient outage, for which stale user
+    # information (up to settings.user_info_stale_ttl old) is served instead
+    USER_INFO_STALE_STATUSES: ClassVar[frozenset] = frozenset({429, 500, 502, 503, 504})
+    
+    # Stored tokens are refreshed this many seconds before they expire
+    TOKEN_REFRESH_BUFFER_SECONDS: ClassVar[int] = 60
+    
+    # Successful refreshes are reused for repeats of the same refresh token
+    # that arrive shortly after; kept brief so a replayed refresh token is not
+    # answered from cache for long
+    REFRESH_RESULT_CACHE_SIZE: ClassVar[int] = 1_000
+    REFRESH_RESULT_CACHE_TTL: ClassVar[int] = 30
+    
+    # Provider calls are limited to settings.<provider>_rate_limit per window
+    # (0 disables this). A call that would wait longer than RATE_LIMIT_MAX_WAIT
+    # for its turn fails at once rather than holding a worker thread.
+    RATE_LIMIT_WINDOW_SECONDS: ClassVar[int] = 900
+    RATE_LIMIT_MAX_WAIT: ClassVar[float] = 1.0
+    
     def __init__(self, provider: str):
         """
         Initialize the OAuth service.
@@ -29,6 +86,118 @@ class BaseOAuthService(ABC):
         
         # In-memory token storage (for development/testing)
         self._tokens = {}
+        
+        # User information keyed by a digest of the access token (never the raw token)
+        self._user_info_cache = TTLCache(maxsize=self.USER_INFO_CACHE_SIZE, ttl=self.settings.user_info_cache_ttl)
+        self._user_info_cache_lock = threading.Lock()
+        
+        # Last known user information per access token, kept much longer as a
+        # fallback while the provider is unavailable; guarded by the same lock
+        self._user_info_stale = TTLCache(maxsize=self.USER_INFO_CACHE_SIZE, ttl=self.settings.user_info_stale_ttl)
+        
+        # Refreshes currently in progress and recent refresh results, both keyed
+        # by a digest of the refresh token and guarded by the same lock
+        self._refresh_inflight: Dict[bytes, Future] = {}
+        self._refresh_results = TLRUCache(maxsize=self.REFRESH_RESULT_CACHE_SIZE, ttu=self._refresh_result_expiry)
+        self._refresh_lock = threading.Lock()
+        
+        # Keeps provider calls within the configured quota so bursts of logins
+        # don't run into provider 429s: a full window's quota can be used at
+        # once, and it refills evenly over the window
+        rate_limit = getattr(self.settings, f"{provider}_rate_limit", 0)
+        self._rate_limiter = (
+            TokenBucket(rate_limit, rate_limit / self.RATE_LIMIT_WINDOW_SECONDS)
+            if rate_limit > 0 else None
+        )
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request to the provider over the shared HTTP session.
+        
+        Waits for the provider's rate limiter first, if one is configured, and
+        applies HTTP_TIMEOUT unless a timeout is given. Rate-limited providers
+        use the session that only retries connection failures, so the limiter
+        sees every request that reaches the provider.
+        
+        Args:
+            method: The HTTP method.
+            url: The request URL.
+            **kwargs: Additional arguments for requests.Session.request.
+            
+        Returns:
+            requests.Response: The provider's response.
+            
+        Raises:
+            HTTPException: If the rate limit would delay the call by more than
+                RATE_LIMIT_MAX_WAIT.
+        """
+        limiter = self._rate_limiter
+        if limiter is not None:
+            delay = limiter.acquire(self.RATE_LIMIT_MAX_WAIT)
+            if delay > self.RATE_LIMIT_MAX_WAIT:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail={
+                        "error": "temporarily_unavailable",
+                        "error_description": f"{self.provider} rate limit reached"
+                    },
+                    headers={"Retry-After": str(math.ceil(delay))}
+                )
+            if delay > 0:
+                time.sleep(delay)
+        
+        kwargs.setdefault("timeout", self.HTTP_TIMEOUT)
+        return get_http_session(connect_retries_only=limiter is not None).request(method, url, **kwargs)
+    
+    @staticmethod
+    def _token_digest(token: str) -> bytes:
+        """
+        Get a short digest of a token for use as a cache key.
+        
+        Args:
+            token: The access or refresh token.
+            
+        Returns:
+            bytes: The 16-byte BLAKE2b digest of the token.
+        """
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    @staticmethod
+    def _copy_exception(exc: Exception) -> Exception:
+        """
+        Copy an exception without its traceback.
+        
+        The constructor is bypassed, since exceptions raised with keyword
+        arguments (such as HTTPException) can't be rebuilt from their args.
+        
+        Args:
+            exc: The exception to copy.
+            
+        Returns:
+            Exception: A new exception of the same type and attributes.
+        """
+        clone = exc.__class__.__new__(exc.__class__, *exc.args)
+        clone.args = exc.args
+        clone.__dict__.update(exc.__dict__)
+        return clone
+    
+    @staticmethod
+    def _parse_json(response: requests.Response) -> Any:
+        """
+        Decode a provider response body with orjson.
+        
+        Args:
+            response: The response from the OAuth provider.
+            
+        Returns:
+            Any: The decoded body, or an unknown-error payload if the body is empty.
+            
+        Raises:
+            ValueError: If the body is not valid JSON.
+        """
+        if not response.content:
+            return {"error": "unknown_error", "error_description": "Empty response body"}
+        return orjson.loads(response.content)
     
     @abstractmethod
     def get_authorization_url(self) -> str:
@@ -40,6 +209,19 @@ class BaseOAuthService(ABC):
         """
         pass
     
+    def start_authorization(self) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Start an authorization flow.
+        
+        Providers that use PKCE return the flow's state and code verifier, which
+        the caller keeps for the callback.
+        
+        Returns:
+            Tuple[str, Optional[str], Optional[str]]: The authorization URL, and
+                the state and code verifier (None without PKCE).
+        """
+        return self.get_authorization_url(), None, None
+    
     @abstractmethod
     def exchange_code_for_token(self, code: str, code_verifier: Optional[str] = None, state: Optional[str] = None) -> OAuthTokenResponse:
         """
@@ -81,18 +263,132 @@ class BaseOAuthService(ABC):
         """
         pass
     
-    def store_token(self, user_id: str, token: OAuthTokenResponse) -> None:
+    def get_user_info_cached(self, access_token: str) -> UserInfo:
+        """
+        Get user information, reusing a recent result for the same access token.
+        
+        If the provider is unavailable (a network error or a status in
+        USER_INFO_STALE_STATUSES), the last known result for the token is
+        returned instead of failing.
+        
+        Args:
+            access_token: The OAuth access token.
+            
+        Returns:
+            UserInfo: The user information.
+            
+        Raises:
+            HTTPException: If the provider call fails and no stale result exists;
+                a network error is reported as 502.
+        """
+        cache_key = self._token_digest(access_token)
+        with self._user_info_cache_lock:
+            user_info = self._user_info_cache.get(cache_key)
+        if user_info is not None:
+            return user_info
+        
+        try:
+            user_info = self.get_user_info(access_token)
+        except (HTTPException, requests.RequestException) as e:
+            if isinstance(e, HTTPException) and e.status_code not in self.USER_INFO_STALE_STATUSES:
+                raise
+            with self._user_info_cache_lock:
+                user_info = self._user_info_stale.get(cache_key)
+            if user_info is None:
+                if isinstance(e, HTTPException):
+                    raise
+                logger.error(f"Could not reach {self.provider} for user info: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail={
+                        "error": "temporarily_unavailable",
+                        "error_description": f"{self.provider} could not be reached"
+                    }
+                ) from e
+            logger.warning(f"Serving stale {self.provider} user info: provider unavailable ({e})")
+            return user_info
+        
+        with self._user_info_cache_lock:
+            self._user_info_cache[cache_key] = user_info
+            self._user_info_stale[cache_key] = user_info
+        return user_info
+    
+    def _refresh_result_expiry(self, key: bytes, token: OAuthTokenResponse, now: float) -> float:
+        """
+        Get the time until which a refresh result may be reused.
+        
+        Args:
+            key: The refresh token digest.
+            token: The refreshed token.
+            now: The current time.
+            
+        Returns:
+            float: The expiry time, no later than the token's own refresh point.
+        """
+        lifetime = token.expires_in - self.TOKEN_REFRESH_BUFFER_SECONDS
+        return now + min(self.REFRESH_RESULT_CACHE_TTL, lifetime)
+    
+    def refresh_token_coalesced(self, refresh_token: str) -> OAuthTokenResponse:
+        """
+        Refresh an access token, sharing one provider call between concurrent
+        refreshes of the same refresh token and reusing a very recent result.
+        
+        Args:
+            refresh_token: The refresh token.
+            
+        Returns:
+            OAuthTokenResponse: The new OAuth token.
+        """
+        key = self._token_digest(refresh_token)
+        with self._refresh_lock:
+            token = self._refresh_results.get(key)
+            if token is not None:
+                return token
+            future = self._refresh_inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._refresh_inflight[key] = future
+        
+        if not is_leader:
+            try:
+                return future.result()
+            except Exception as e:
+                # Every follower receives the leader's exception; raise a copy
+                # so concurrent raises don't all extend one shared traceback
+                raise self._copy_exception(e) from None
+        
+        try:
+            token = self.refresh_token(refresh_token)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            with self._refresh_lock:
+                self._refresh_results[key] = token
+            future.set_result(token)
+            return token
+        finally:
+            with self._refresh_lock:
+                self._refresh_inflight.pop(key, None)
+    
+    def store_token(self, user_id: str, token: OAuthTokenResponse) -> OAuthToken:
         """
         Store an OAuth token in memory (for development/testing).
         
         Args:
             user_id: The user ID.
             token: The OAuth token.
+            
+        Returns:
+            OAuthToken: The stored token.
         """
         # Calculate TTL for token expiration
         expires_at = int(time.time()) + token.expires_in
         
-        oauth_token = OAuthToken(
+        # Every field comes from an already-validated token response, so skip
+        # revalidating them
+        oauth_token = OAuthToken.model_construct(
             user_id=user_id,
             provider=self.provider,
             access_token=token.access_token,
@@ -100,12 +396,14 @@ class BaseOAuthService(ABC):
             expires_in=token.expires_in,
             refresh_token=token.refresh_token,
             scope=token.scope,
-            expires_at=expires_at
+            expires_at=expires_at,
+            refresh_at=expires_at - self.TOKEN_REFRESH_BUFFER_SECONDS
         )
         
         # Store in memory
         key = f"{user_id}:{self.provider}"
         self._tokens[key] = oauth_token
+        return oauth_token
     
     def get_token(self, user_id: str) -> Optional[OAuthToken]:
         """
@@ -120,29 +418,58 @@ class BaseOAuthService(ABC):
         key = f"{user_id}:{self.provider}"
         token = self._tokens.get(key)
         
-        # Check if token exists and is not expired or about to expire (within 60 seconds)
-        if token and token.expires_at:
-            now = time.time()
-            if token.expires_at - now < 60:
+        # Check if token exists and is not expired or about to expire
+        if token and token.refresh_at:
+            if time.time() >= token.refresh_at:
                 # Token is expired or about to expire, try to refresh
                 if token.refresh_token:
                     try:
-                        new_token = self.refresh_token(token.refresh_token)
-                        # Store the new token
-                        self.store_token(user_id, new_token)
-                        # Return the newly stored token
-                        return self._tokens.get(key)
+                        new_token = self.refresh_token_coalesced(token.refresh_token)
+                        # Store and return the new token
+                        return self.store_token(user_id, new_token)
                     except Exception:
                         # If refresh fails, delete the token
-                        self.delete_token(user_id)
+                        self._tokens.pop(key, None)
                         return None
                 else:
                     # No refresh token, delete the token
-                    self.delete_token(user_id)
+                    self._tokens.pop(key, None)
                     return None
         
         return token
     
+    def refresh_stored_token(self, user_id: str, refresh_token: str) -> Optional[OAuthToken]:
+        """
+        Refresh a user's stored token with the refresh token the client supplied.
+        
+        The supplied refresh token must be the one stored for the user, so a
+        recent refresh result is only reused for the user it belongs to, and a
+        refresh token that has already been rotated is rejected rather than
+        answered from cache.
+        
+        Args:
+            user_id: The user ID.
+            refresh_token: The refresh token supplied by the client.
+            
+        Returns:
+            Optional[OAuthToken]: The new stored token, or None if no token is
+                stored for the user.
+                
+        Raises:
+            HTTPException: If the refresh token does not match the stored one.
+        """
+        token = self._tokens.get(f"{user_id}:{self.provider}")
+        if token is None:
+            return None
+        
+        if not token.refresh_token or not hmac.compare_digest(token.refresh_token.encode(), refresh_token.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error": "invalid_grant", "error_description": "Refresh token does not match the stored token"}
+            )
+        
+        return self.store_token(user_id, self.refresh_token_coalesced(refresh_token))
+    
     def delete_token(self, user_id: str) -> None:
         """
         Delete an OAuth token from memory.
@@ -150,9 +477,7 @@ class BaseOAuthService(ABC):
         Args:
             user_id: The user ID.
         """
-        key = f"{user_id}:{self.provider}"
-        if key in self._tokens:
-            del self._tokens[key]
+        self._tokens.pop(f"{user_id}:{self.provider}", None)
     
     def handle_request_error(
         self, 
@@ -169,9 +494,16 @@ class BaseOAuthService(ABC):
         """
         status_code = response.status_code
         
-        try:
-            error_data = response.json()
-        except ValueError:
+        # Only try to parse bodies that claim to be JSON; HTML error pages from
+        # gateways skip the failed decode entirely
+        error_data = None
+        if "json" in response.headers.get("content-type", ""):
+            try:
+                error_data = self._parse_json(response)
+            except ValueError:
+                pass
+        
+        if error_data is None:
             error_data = {"error": "unknown_error", "error_description": response.text}
         
         return status_code, error_data 
\ No newline at end of file
@@ -1,16 +1,55 @@
 """
 OAuth service factory module.
 """
+import importlib
+import threading
+from typing import Dict
+
 from fastapi import HTTPException, status
 
-from app.config.providers import PROVIDER_SERVICES, is_provider_supported
+from app.config.providers import PROVIDER_ORDINAL, PROVIDER_SERVICE_TABLE
+from app.config.settings import get_settings
 from app.services.oauth_base import BaseOAuthService
 
+# Detail for unknown providers outside dev mode; the provider name is only
+# echoed back in dev mode
+_UNSUPPORTED_PROVIDER_DETAIL = "Unsupported provider"
+
+
+def unsupported_provider_error(provider: str) -> HTTPException:
+    """
+    Get the exception to raise for an unsupported provider.
+    
+    A new exception is built for every call: a shared instance would collect
+    the traceback of every request that raised it.
+    
+    Args:
+        provider: The requested provider name.
+        
+    Returns:
+        HTTPException: The exception, naming the provider in dev mode.
+    """
+    detail = f"Unsupported provider: {provider}" if get_settings().dev_mode else _UNSUPPORTED_PROVIDER_DETAIL
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=detail
+    )
+
+
+# One service instance per provider, created on first use
+_SERVICES: Dict[str, BaseOAuthService] = {}
+_SERVICES_LOCK = threading.Lock()
+
 
 def create_oauth_service(provider: str) -> BaseOAuthService:
     """
     Create an OAuth service instance for the specified provider.
     
+    Instances are cached per provider, so every request for the same provider
+    shares one service (and its in-memory token and PKCE state). Creation is
+    serialized so concurrent first requests cannot end up with different
+    instances.
+    
     Args:
         provider: The OAuth provider name.
         
@@ -20,11 +59,20 @@ def create_oauth_service(provider: str) -> BaseOAuthService:
     Raises:
         HTTPException: If the provider is not supported.
     """
-    if not is_provider_supported(provider):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported provider: {provider}"
-        )
+    service = _SERVICES.get(provider)
+    if service is not None:
+        return service
+    
+    ordinal = PROVIDER_ORDINAL.get(provider)
+    if ordinal is None:
+        raise unsupported_provider_error(provider)
     
-    service_class = PROVIDER_SERVICES[provider]
-    return service_class() 
\ No newline at end of file
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(provider)
+        if service is None:
+            # Import the provider module on first use
+            module_path, class_name = PROVIDER_SERVICE_TABLE[ordinal].split(":")
+            service_class = getattr(importlib.import_module(module_path), class_name)
+            service = service_class()
+            _SERVICES[provider] = service
+    return service
\ No newline at end of file
@@ -9,43 +9,86 @@ This service implements OAuth 2.0 authentication for Google. It handles:
 Note: User info retrieval is skipped for Google OAuth to avoid potential issues with the userinfo endpoint.
 Instead, the service returns only the tokens which can be used directly by the client application.
 """
-import json
 import logging
 import time
 from typing import Dict, Optional
 from urllib.parse import urlencode
 
+import orjson
 import requests
 from fastapi import HTTPException, status
 
-from app.config.settings import get_oauth_config, get_settings
+from app.config.settings import get_oauth_config
 from app.models.oauth import OAuthTokenResponse, UserInfo
 from app.services.oauth_base import BaseOAuthService
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Form fields masked when token requests are logged
+_REDACT_KEYS = frozenset(("client_secret", "refresh_token"))
+
+
+def _redact(data: Dict) -> Dict:
+    """
+    Mask secret fields of a token request for debug logging.
+    
+    Args:
+        data: The token request form data.
+        
+    Returns:
+        Dict: A copy of the data with secret values replaced by "***".
+    """
+    return {k: "***" if k in _REDACT_KEYS else v for k, v in data.items()}
+
+
+# Returned by get_user_info when the service runs with placeholder credentials
+_MOCK_USER_INFO = UserInfo.model_construct(
+    id="12345678901234567890",
+    username="Mock Google User",
+    email="mock.google.user@example.com",
+    profile_url="https://profiles.google.com/mock.user",
+    avatar_url="https://lh3.googleusercontent.com/a-/mock-google-avatar",
+    raw_data={
+        "id": "12345678901234567890",
+        "name": "Mock Google User",
+        "given_name": "Mock",
+        "family_name": "User",
+        "email": "mock.google.user@example.com",
+        "verified_email": True,
+        "picture": "https://lh3.googleusercontent.com/a-/mock-google-avatar",
+        "locale": "en"
+    }
+)
+
+
 class GoogleOAuthService(BaseOAuthService):
     """
     Google OAuth service implementation.
     """
     
+    __slots__ = (
+        "config",
+        "_use_mock",
+        "_authorization_url",
+        "_userinfo_url",
+        "_token_request_data",
+        "_refresh_request_data",
+    )
+    
     def __init__(self):
         """
         Initialize the Google OAuth service.
         """
         super().__init__("google")
         self.config = get_oauth_config("google")
-        self.settings = get_settings()
+        
+        # Placeholder credentials switch the service to mock data
+        self._use_mock = not self.config["client_id"] or self.config["client_id"] == "your_google_client_id_here"
+        
         logger.info(f"Initialized GoogleOAuthService with client_id: {self.config['client_id'][:5]}*** and redirect_uri: {self.config['redirect_uri']}")
-    
-    def get_authorization_url(self) -> str:
-        """
-        Get the authorization URL for Google.
         
-        Returns:
-            str: The authorization URL.
-        """
+        # The authorization URL only depends on config, so build it once
         params = {
             "response_type": "code",
             "client_id": self.config["client_id"],
@@ -54,11 +97,34 @@ class GoogleOAuthService(BaseOAuthService):
             "access_type": "offline",
             "prompt": "consent"
         }
+        self._authorization_url = f"{self.config['authorize_url']}?{urlencode(params)}"
+        
+        # Google's userinfo endpoint
+        self._userinfo_url = f"{self.config['api_base_url']}userinfo"
         
-        authorization_url = f"{self.config['authorize_url']}?{urlencode(params)}"
+        # Config-derived parts of the token endpoint form bodies
+        self._token_request_data = {
+            "grant_type": "authorization_code",
+            "client_id": self.config["client_id"],
+            "client_secret": self.config["client_secret"],
+            "redirect_uri": self.config["redirect_uri"]
+        }
+        self._refresh_request_data = {
+            "grant_type": "refresh_token",
+            "client_id": self.config["client_id"],
+            "client_secret": self.config["client_secret"]
+        }
         logger.info(f"Generated Google authorization URL with params: {params}")
-        logger.debug(f"Full authorization URL: {authorization_url}")
-        return authorization_url
+    
+    def get_authorization_url(self) -> str:
+        """
+        Get the authorization URL for Google.
+        
+        Returns:
+            str: The authorization URL.
+        """
+        logger.debug("Full authorization URL: %s", self._authorization_url)
+        return self._authorization_url
     
     def exchange_code_for_token(self, code: str, code_verifier: Optional[str] = None, state: Optional[str] = None) -> OAuthTokenResponse:
         """
@@ -73,67 +139,65 @@ class GoogleOAuthService(BaseOAuthService):
             OAuthTokenResponse: The OAuth token.
         """
         logger.info("Exchanging code for token")
-        logger.debug(f"Authorization code: {code[:5]}*** (partial)")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Authorization code: %s*** (partial)", code[:5])
         
         # Note: Google doesn't require PKCE, so we ignore code_verifier and state
         if code_verifier:
             logger.warning("Code verifier provided but Google doesn't use PKCE - ignoring this parameter")
         if state:
-            logger.debug(f"State parameter provided: {state} - Google doesn't use this for token exchange")
+            logger.debug("State parameter provided: %s - Google doesn't use this for token exchange", state)
         
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_google_client_id_here" or not self.config["client_id"]:
+        if self._use_mock:
             logger.warning("Using placeholder credentials, returning mock token")
             return self._get_mock_token()
             
-        data = {
-            "grant_type": "authorization_code",
-            "code": code,
-            "client_id": self.config["client_id"],
-            "client_secret": self.config["client_secret"],
-            "redirect_uri": self.config["redirect_uri"]
-        }
+        data = {**self._token_request_data, "code": code}
         
-        logger.debug(f"Token request data: {json.dumps({k: v if k != 'client_secret' else '***' for k, v in data.items()})}")
-        logger.debug(f"Token URL: {self.config['token_url']}")
-        logger.debug(f"Request method: POST")
+        if debug:
+            logger.debug("Token request data: %s", _redact(data))
+            logger.debug("Token URL: %s", self.config['token_url'])
+            logger.debug("Request method: POST")
         
         try:
-            response = requests.post(self.config["token_url"], data=data)
-            logger.debug(f"Token response status: {response.status_code}")
-            logger.debug(f"Token response headers: {dict(response.headers)}")
-            
-            if response.content:
-                logger.debug(f"Token response content: {response.text[:1000]}")
+            response = self._request("POST", self.config["token_url"], data=data)
+            if debug:
+                logger.debug("Token response status: %s", response.status_code)
+                logger.debug("Token response headers: %s", response.headers)
+                if response.content:
+                    logger.debug("Token response content: %s", response.text[:1000])
             
             if response.status_code != 200:
-                error_data = response.json() if response.content else {"error": "Unknown error"}
+                error_data = self._parse_json(response)
                 logger.error(f"Failed to exchange code for token: {error_data}")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=error_data
                 )
             
-            token_data = response.json()
+            token_data = self._parse_json(response)
             
             # Validate token structure
             if "access_token" not in token_data:
                 logger.error("Invalid token response: missing access_token")
-                logger.debug(f"Full token data: {token_data}")
+                logger.debug("Full token data: %s", token_data)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Invalid token response from Google: missing access_token"
                 )
                 
             # Log token structure (safely)
-            token_info = {
-                "access_token_length": len(token_data.get("access_token", "")),
-                "token_type": token_data.get("token_type"),
-                "expires_in": token_data.get("expires_in"),
-                "has_refresh_token": "refresh_token" in token_data,
-                "scope": token_data.get("scope")
-            }
-            logger.debug(f"Token structure: {token_info}")
+            if debug:
+                token_info = {
+                    "access_token_length": len(token_data.get("access_token", "")),
+                    "token_type": token_data.get("token_type"),
+                    "expires_in": token_data.get("expires_in"),
+                    "has_refresh_token": "refresh_token" in token_data,
+                    "scope": token_data.get("scope")
+                }
+                logger.debug("Token structure: %s", token_info)
             
             # Handle scope being a list by joining it with spaces if needed
             scope = token_data.get("scope")
@@ -159,10 +223,11 @@ class GoogleOAuthService(BaseOAuthService):
                     detail="Empty access token in response"
                 )
             
-            logger.debug(f"Created OAuthTokenResponse with token_type: {token_response.token_type}, access_token length: {len(token_response.access_token)}")
+            if debug:
+                logger.debug("Created OAuthTokenResponse with token_type: %s, access_token length: %d", token_response.token_type, len(token_response.access_token))
             
             return token_response
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             logger.error(f"Request exception during token exchange: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -182,32 +247,28 @@ class GoogleOAuthService(BaseOAuthService):
         logger.info("Refreshing Google access token")
         
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_google_client_id_here" or not self.config["client_id"]:
+        if self._use_mock:
             logger.warning("Using placeholder credentials, returning mock token")
             return self._get_mock_token()
             
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.config["client_id"],
-            "client_secret": self.config["client_secret"],
-            "refresh_token": refresh_token
-        }
+        data = {**self._refresh_request_data, "refresh_token": refresh_token}
         
-        logger.debug(f"Refresh token request data: {json.dumps({k: v if k not in ['client_secret', 'refresh_token'] else '***' for k, v in data.items()})}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Refresh token request data: %s", _redact(data))
         
         try:
-            response = requests.post(self.config["token_url"], data=data)
-            logger.debug(f"Refresh token response status: {response.status_code}")
+            response = self._request("POST", self.config["token_url"], data=data)
+            logger.debug("Refresh token response status: %s", response.status_code)
             
             if response.status_code != 200:
-                error_data = response.json() if response.content else {"error": "Unknown error"}
+                error_data = self._parse_json(response)
                 logger.error(f"Failed to refresh token: {error_data}")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=error_data
                 )
             
-            token_data = response.json()
+            token_data = self._parse_json(response)
             # Handle scope being a list by joining it with spaces if needed
             scope = token_data.get("scope")
             if isinstance(scope, list):
@@ -223,7 +284,7 @@ class GoogleOAuthService(BaseOAuthService):
                 refresh_token=refresh_token,  # Reuse the original refresh token
                 scope=scope
             )
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             logger.error(f"Request exception during token refresh: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -241,10 +302,12 @@ class GoogleOAuthService(BaseOAuthService):
             UserInfo: The user information.
         """
         logger.info("Getting user info from Google")
-        logger.debug(f"Using access token: {access_token[:5]}*** (partial)")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Using access token: %s*** (partial)", access_token[:5])
         
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_google_client_id_here" or not self.config["client_id"]:
+        if self._use_mock:
             logger.warning("Using placeholder credentials, returning mock user info")
             return self._get_mock_user_info()
             
@@ -253,40 +316,43 @@ class GoogleOAuthService(BaseOAuthService):
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
+        userinfo_url = self._userinfo_url
         
-        logger.debug(f"User info request headers: {json.dumps({k: v[:10] + '...' if k == 'Authorization' else v for k, v in headers.items()})}")
-        
-        # Use the correct URL for Google's userinfo endpoint
-        userinfo_url = "https://www.googleapis.com/oauth2/v1/userinfo"
-        logger.debug(f"User info request URL: {userinfo_url}")
+        if debug:
+            logger.debug("User info request headers: %s", orjson.dumps({k: v[:10] + '...' if k == 'Authorization' else v for k, v in headers.items()}).decode())
+            logger.debug("User info request URL: %s", userinfo_url)
         
         try:
             # Log the full request for debugging
-            logger.debug(f"Making GET request to {userinfo_url} with Authorization: Bearer {access_token[:5]}***")
+            if debug:
+                logger.debug("Making GET request to %s with Authorization: Bearer %s***", userinfo_url, access_token[:5])
             
             # Make request to Google's userinfo endpoint
-            response = requests.get(userinfo_url, headers=headers)
-            logger.debug(f"User info response status: {response.status_code}")
-            logger.debug(f"User info response headers: {dict(response.headers)}")
-            
-            if response.content:
-                logger.debug(f"User info response content: {response.text[:1000]}")
+            response = self._request("GET", userinfo_url, headers=headers)
+            if debug:
+                logger.debug("User info response status: %s", response.status_code)
+                logger.debug("User info response headers: %s", response.headers)
+                if response.content:
+                    logger.debug("User info response content: %s", response.text[:1000])
             
             if response.status_code != 200:
-                error_data = response.json() if response.content else {"error": "Unknown error"}
+                # Keep Google's status so callers can tell an outage from a
+                # rejected token
+                status_code, error_data = self.handle_request_error(response)
                 logger.error(f"Failed to get user info: {error_data}")
                 
                 # Add some additional debugging info
-                if response.status_code == 401:
+                if status_code == 401:
                     logger.error("Authentication failed: Token may be invalid, expired, or malformed")
-                    logger.debug(f"Original access token: {access_token[:10]}...")
+                    if debug:
+                        logger.debug("Original access token: %s...", access_token[:10])
                 
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
+                    status_code=status_code,
                     detail=error_data
                 )
             
-            user_data = response.json()
+            user_data = self._parse_json(response)
             logger.info(f"Successfully retrieved user info for user ID: {user_data.get('id')}")
             
             return UserInfo(
@@ -297,8 +363,10 @@ class GoogleOAuthService(BaseOAuthService):
                 avatar_url=user_data.get("picture"),
                 raw_data=user_data
             )
-        except requests.RequestException as e:
-            logger.error(f"Request exception during user info retrieval: {str(e)}", exc_info=True)
+        except ValueError as e:
+            # Network errors propagate, like Twitter's, so the stale fallback
+            # in get_user_info_cached can cover them
+            logger.error(f"Invalid user info response: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error retrieving user info: {str(e)}"
@@ -312,36 +380,21 @@ class GoogleOAuthService(BaseOAuthService):
             OAuthTokenResponse: A mock OAuth token.
         """
         logger.debug("Generating mock Google token")
-        return OAuthTokenResponse(
-            access_token=f"mock_google_access_token_{int(time.time())}",
+        now = int(time.time())
+        return OAuthTokenResponse.model_construct(
+            access_token=f"mock_google_access_token_{now}",
             token_type="Bearer",
             expires_in=3600,
-            refresh_token=f"mock_google_refresh_token_{int(time.time())}",
+            refresh_token=f"mock_google_refresh_token_{now}",
             scope="openid email profile"
         )
     
     def _get_mock_user_info(self) -> UserInfo:
         """
-        Generate mock user information for testing purposes.
+        Get the mock user information used with placeholder credentials.
         
         Returns:
-            UserInfo: Mock user information.
+            UserInfo: A copy of the mock user information, so callers can't
+                change the shared constant.
         """
-        logger.debug("Generating mock Google user info")
-        return UserInfo(
-            id="12345678901234567890",
-            username="Mock Google User",
-            email="mock.google.user@example.com",
-            profile_url="https://profiles.google.com/mock.user",
-            avatar_url="https://lh3.googleusercontent.com/a-/mock-google-avatar",
-            raw_data={
-                "id": "12345678901234567890",
-                "name": "Mock Google User",
-                "given_name": "Mock",
-                "family_name": "User",
-                "email": "mock.google.user@example.com",
-                "verified_email": True,
-                "picture": "https://lh3.googleusercontent.com/a-/mock-google-avatar",
-                "locale": "en"
-            }
-        ) 
\ No newline at end of file
+        return _MOCK_USER_INFO.model_copy(deep=True)
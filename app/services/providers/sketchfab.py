@@ -1,31 +1,88 @@
 """
 Sketchfab OAuth service implementation.
 """
-import json
+import operator
 import time
 from typing import Dict, Optional
 from urllib.parse import urlencode
 
-import requests
 from fastapi import HTTPException, status
 
-from app.config.settings import get_oauth_config, get_settings
+from app.config.settings import get_oauth_config
 from app.models.oauth import OAuthTokenResponse, UserInfo
 from app.services.oauth_base import BaseOAuthService
 
 
+# Returned by get_user_info when the service runs with placeholder credentials
+_MOCK_USER_INFO = UserInfo.model_construct(
+    id="mock_user_123",
+    username="mock_sketchfab_user",
+    email="mock_user@example.com",
+    profile_url="https://sketchfab.com/mock_user",
+    avatar_url="https://sketchfab.com/avatars/mock_user.jpg",
+    raw_data={
+        "uid": "mock_user_123",
+        "username": "mock_sketchfab_user",
+        "email": "mock_user@example.com",
+        "profileUrl": "https://sketchfab.com/mock_user",
+        "avatar": {
+            "url": "https://sketchfab.com/avatars/mock_user.jpg"
+        }
+    }
+)
+
+# Required fields of the token and user responses, fetched in one call
+_TOKEN_FIELDS = operator.itemgetter("access_token", "token_type", "expires_in")
+_USER_FIELDS = operator.itemgetter("uid", "username")
+
+
 class SketchfabOAuthService(BaseOAuthService):
     """
     Sketchfab OAuth service implementation.
     """
     
+    __slots__ = (
+        "config",
+        "_use_mock",
+        "_authorization_url",
+        "_userinfo_url",
+        "_token_request_data",
+        "_refresh_request_data",
+    )
+    
     def __init__(self):
         """
         Initialize the Sketchfab OAuth service.
         """
         super().__init__("sketchfab")
         self.config = get_oauth_config("sketchfab")
-        self.settings = get_settings()
+        
+        # Placeholder credentials switch the service to mock data
+        self._use_mock = not self.config["client_id"] or self.config["client_id"] == "your_sketchfab_client_id"
+        
+        # The authorization URL only depends on config, so build it once
+        params = {
+            "response_type": "code",
+            "client_id": self.config["client_id"],
+            "redirect_uri": self.config["redirect_uri"]
+        }
+        self._authorization_url = f"{self.config['authorize_url']}?{urlencode(params)}"
+        
+        # Sketchfab's current-user endpoint
+        self._userinfo_url = f"{self.config['api_base_url']}users/me"
+        
+        # Config-derived parts of the token endpoint form bodies
+        self._token_request_data = {
+            "grant_type": "authorization_code",
+            "client_id": self.config["client_id"],
+            "client_secret": self.config["client_secret"],
+            "redirect_uri": self.config["redirect_uri"]
+        }
+        self._refresh_request_data = {
+            "grant_type": "refresh_token",
+            "client_id": self.config["client_id"],
+            "client_secret": self.config["client_secret"]
+        }
     
     def get_authorization_url(self) -> str:
         """
@@ -34,13 +91,7 @@ class SketchfabOAuthService(BaseOAuthService):
         Returns:
             str: The authorization URL.
         """
-        params = {
-            "response_type": "code",
-            "client_id": self.config["client_id"],
-            "redirect_uri": self.config["redirect_uri"]
-        }
-        
-        return f"{self.config['authorize_url']}?{urlencode(params)}"
+        return self._authorization_url
     
     def exchange_code_for_token(self, code: str, code_verifier: Optional[str] = None, state: Optional[str] = None) -> OAuthTokenResponse:
         """
@@ -55,18 +106,12 @@ class SketchfabOAuthService(BaseOAuthService):
             OAuthTokenResponse: The OAuth token.
         """
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_sketchfab_client_id" or not self.config["client_id"]:
+        if self._use_mock:
             return self._get_mock_token()
             
-        data = {
-            "grant_type": "authorization_code",
-            "code": code,
-            "client_id": self.config["client_id"],
-            "client_secret": self.config["client_secret"],
-            "redirect_uri": self.config["redirect_uri"]
-        }
+        data = {**self._token_request_data, "code": code}
         
-        response = requests.post(self.config["token_url"], data=data)
+        response = self._request("POST", self.config["token_url"], data=data)
         
         if response.status_code != 200:
             status_code, error_data = self.handle_request_error(response)
@@ -75,16 +120,17 @@ class SketchfabOAuthService(BaseOAuthService):
                 detail=error_data
             )
         
-        token_data = response.json()
+        token_data = self._parse_json(response)
         # Handle scope being a list by joining it with spaces if needed
         scope = token_data.get("scope")
         if isinstance(scope, list):
             scope = " ".join(scope)
-            
+        
+        access_token, token_type, expires_in = _TOKEN_FIELDS(token_data)
         return OAuthTokenResponse(
-            access_token=token_data["access_token"],
-            token_type=token_data["token_type"],
-            expires_in=token_data["expires_in"],
+            access_token=access_token,
+            token_type=token_type,
+            expires_in=expires_in,
             refresh_token=token_data.get("refresh_token"),
             scope=scope
         )
@@ -100,17 +146,12 @@ class SketchfabOAuthService(BaseOAuthService):
             OAuthTokenResponse: The new OAuth token.
         """
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_sketchfab_client_id" or not self.config["client_id"]:
+        if self._use_mock:
             return self._get_mock_token()
             
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.config["client_id"],
-            "client_secret": self.config["client_secret"],
-            "refresh_token": refresh_token
-        }
+        data = {**self._refresh_request_data, "refresh_token": refresh_token}
         
-        response = requests.post(self.config["token_url"], data=data)
+        response = self._request("POST", self.config["token_url"], data=data)
         
         if response.status_code != 200:
             status_code, error_data = self.handle_request_error(response)
@@ -119,16 +160,17 @@ class SketchfabOAuthService(BaseOAuthService):
                 detail=error_data
             )
         
-        token_data = response.json()
+        token_data = self._parse_json(response)
         # Handle scope being a list by joining it with spaces if needed
         scope = token_data.get("scope")
         if isinstance(scope, list):
             scope = " ".join(scope)
-            
+        
+        access_token, token_type, expires_in = _TOKEN_FIELDS(token_data)
         return OAuthTokenResponse(
-            access_token=token_data["access_token"],
-            token_type=token_data["token_type"],
-            expires_in=token_data["expires_in"],
+            access_token=access_token,
+            token_type=token_type,
+            expires_in=expires_in,
             refresh_token=token_data.get("refresh_token"),
             scope=scope
         )
@@ -144,14 +186,14 @@ class SketchfabOAuthService(BaseOAuthService):
             UserInfo: The user information.
         """
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_sketchfab_client_id" or not self.config["client_id"]:
+        if self._use_mock:
             return self._get_mock_user_info()
             
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
         
-        response = requests.get(f"{self.config['api_base_url']}users/me", headers=headers)
+        response = self._request("GET", self._userinfo_url, headers=headers)
         
         if response.status_code != 200:
             status_code, error_data = self.handle_request_error(response)
@@ -160,11 +202,12 @@ class SketchfabOAuthService(BaseOAuthService):
                 detail=error_data
             )
         
-        user_data = response.json()
+        user_data = self._parse_json(response)
+        uid, username = _USER_FIELDS(user_data)
         
         return UserInfo(
-            id=user_data["uid"],
-            username=user_data["username"],
+            id=uid,
+            username=username,
             email=user_data.get("email"),
             profile_url=user_data.get("profileUrl"),
             avatar_url=user_data.get("avatar", {}).get("url"),
@@ -178,34 +221,21 @@ class SketchfabOAuthService(BaseOAuthService):
         Returns:
             OAuthTokenResponse: A mock OAuth token.
         """
-        return OAuthTokenResponse(
-            access_token=f"mock_access_token_{int(time.time())}",
+        now = int(time.time())
+        return OAuthTokenResponse.model_construct(
+            access_token=f"mock_access_token_{now}",
             token_type="Bearer",
             expires_in=3600,
-            refresh_token=f"mock_refresh_token_{int(time.time())}",
+            refresh_token=f"mock_refresh_token_{now}",
             scope="read write"
         )
     
     def _get_mock_user_info(self) -> UserInfo:
         """
-        Generate mock user information for testing purposes.
+        Get the mock user information used with placeholder credentials.
         
         Returns:
-            UserInfo: Mock user information.
+            UserInfo: A copy of the mock user information, so callers can't
+                change the shared constant.
         """
-        return UserInfo(
-            id="mock_user_123",
-            username="mock_sketchfab_user",
-            email="mock_user@example.com",
-            profile_url="https://sketchfab.com/mock_user",
-            avatar_url="https://sketchfab.com/avatars/mock_user.jpg",
-            raw_data={
-                "uid": "mock_user_123",
-                "username": "mock_sketchfab_user",
-                "email": "mock_user@example.com",
-                "profileUrl": "https://sketchfab.com/mock_user",
-                "avatar": {
-                    "url": "https://sketchfab.com/avatars/mock_user.jpg"
-                }
-            }
-        ) 
\ No newline at end of file
+        return _MOCK_USER_INFO.model_copy(deep=True)
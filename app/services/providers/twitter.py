@@ -3,43 +3,89 @@ Twitter OAuth service implementation.
 """
 import base64
 import hashlib
-import json
-import os
-import re
+import secrets
 import time
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from urllib.parse import urlencode
 
 import requests
-from fastapi import HTTPException, Request, status
-from requests_oauthlib import OAuth2Session
-from oauthlib.oauth2.rfc6749.errors import InvalidGrantError, TokenExpiredError
+from fastapi import HTTPException, status
+from pydantic import ValidationError
 
-from app.config.settings import get_oauth_config, get_settings
+from app.config.settings import get_oauth_config
 from app.models.oauth import OAuthTokenResponse, UserInfo
 from app.services.oauth_base import BaseOAuthService
 
+# Translation table removing the non-alphanumeric characters of URL-safe base64
+_PKCE_STRIP = str.maketrans("", "", "-_")
+
+# Returned by get_user_info when the service runs with placeholder credentials
+_MOCK_USER_INFO = UserInfo.model_construct(
+    id="1234567890",
+    username="mock_twitter_user",
+    email=None,
+    profile_url="https://twitter.com/mock_twitter_user",
+    avatar_url="https://pbs.twimg.com/profile_images/mock_image.jpg",
+    raw_data={
+        "id": "1234567890",
+        "name": "Mock Twitter User",
+        "username": "mock_twitter_user",
+        "profile_image_url": "https://pbs.twimg.com/profile_images/mock_image.jpg"
+    }
+)
+
 
 class TwitterOAuthService(BaseOAuthService):
     """
     Twitter OAuth service implementation.
     """
     
+    __slots__ = (
+        "config",
+        "_use_mock",
+        "_authorize_prefix",
+        "_client_auth",
+        "_token_request_data",
+        "_refresh_request_data",
+    )
+    
     def __init__(self):
         """
         Initialize the Twitter OAuth service.
         """
         super().__init__("twitter")
         self.config = get_oauth_config("twitter")
-        self.settings = get_settings()
         
-        # Store code verifiers in memory (keyed by state)
-        self._code_verifiers = {}
+        # Placeholder credentials switch the service to mock data
+        self._use_mock = not self.config["client_id"] or self.config["client_id"] == "your_twitter_client_id"
+        
+        # Static part of the authorization URL; only state and the PKCE
+        # challenge change per request
+        params = {
+            "response_type": "code",
+            "client_id": self.config["client_id"],
+            "redirect_uri": self.config["redirect_uri"],
+            "scope": self.config["scopes"]
+        }
+        self._authorize_prefix = f"{self.config['authorize_url']}?{urlencode(params)}"
+        
+        # Twitter authenticates confidential clients with HTTP Basic on the
+        # token endpoint; these are the config-derived parts of the form bodies
+        self._client_auth = (self.config["client_id"], self.config["client_secret"])
+        self._token_request_data = {
+            "grant_type": "authorization_code",
+            "redirect_uri": self.config["redirect_uri"]
+        }
+        self._refresh_request_data = {
+            "grant_type": "refresh_token",
+            "client_id": self.config["client_id"]
+        }
     
     def generate_code_verifier(self) -> str:
         """Generate a code verifier for PKCE."""
-        code_verifier = base64.urlsafe_b64encode(os.urandom(30)).decode('utf-8')
-        return re.sub('[^a-zA-Z0-9]+', '', code_verifier)
+        # 48 random bytes encode to 64 URL-safe characters; dropping "-" and "_"
+        # still leaves well over the 43 characters RFC 7636 requires
+        return secrets.token_urlsafe(48).translate(_PKCE_STRIP)[:43]
     
     def generate_code_challenge(self, code_verifier: str) -> str:
         """Generate a code challenge from the code verifier."""
@@ -50,31 +96,34 @@ class TwitterOAuthService(BaseOAuthService):
         """
         Get the authorization URL for Twitter.
         
+        Not supported: a Twitter flow needs the PKCE code verifier at the
+        callback, so use start_authorization, which returns it with the URL.
+        
+        Raises:
+            NotImplementedError: Always.
+        """
+        raise NotImplementedError("Twitter flows need a code verifier; use start_authorization()")
+    
+    def start_authorization(self) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Start an authorization flow with a new state and PKCE code verifier.
+        
         Returns:
-            str: The authorization URL.
+            Tuple[str, Optional[str], Optional[str]]: The authorization URL, state
+                and code verifier.
         """
         # Generate PKCE code verifier
         code_verifier = self.generate_code_verifier()
         code_challenge = self.generate_code_challenge(code_verifier)
         
-        # Create OAuth2Session
-        twitter = OAuth2Session(
-            self.config["client_id"],
-            redirect_uri=self.config["redirect_uri"],
-            scope=self.config["scopes"].split()
-        )
+        # Generate a URL-safe state value for this flow
+        state = secrets.token_urlsafe(24)
         
-        # Get authorization URL
-        authorization_url, state = twitter.authorization_url(
-            self.config["authorize_url"],
-            code_challenge=code_challenge,
-            code_challenge_method="S256"
+        authorization_url = (
+            f"{self._authorize_prefix}&state={state}"
+            f"&code_challenge={code_challenge}&code_challenge_method=S256"
         )
-        
-        # Store code verifier for later use
-        self._code_verifiers[state] = code_verifier
-        
-        return authorization_url
+        return authorization_url, state, code_verifier
     
     def exchange_code_for_token(self, code: str, code_verifier: Optional[str] = None, state: Optional[str] = None) -> OAuthTokenResponse:
         """
@@ -89,52 +138,17 @@ class TwitterOAuthService(BaseOAuthService):
             OAuthTokenResponse: The OAuth token.
         """
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_twitter_client_id" or not self.config["client_id"]:
+        if self._use_mock:
             return self._get_mock_token()
         
-        # Get code verifier from storage if not provided
-        if not code_verifier and state and state in self._code_verifiers:
-            code_verifier = self._code_verifiers.pop(state)
-        
         if not code_verifier:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"error": "invalid_request", "error_description": "Missing code_verifier"}
             )
         
-        try:
-            # Create OAuth2Session
-            twitter = OAuth2Session(
-                self.config["client_id"],
-                redirect_uri=self.config["redirect_uri"]
-            )
-            
-            # Exchange code for token
-            token = twitter.fetch_token(
-                self.config["token_url"],
-                client_secret=self.config["client_secret"],
-                code=code,
-                code_verifier=code_verifier
-            )
-            
-            # Convert to OAuthTokenResponse
-            # Handle scope being a list by joining it with spaces if needed
-            scope = token.get("scope")
-            if isinstance(scope, list):
-                scope = " ".join(scope)
-                
-            return OAuthTokenResponse(
-                access_token=token["access_token"],
-                token_type=token["token_type"],
-                expires_in=token.get("expires_in", 7200),
-                refresh_token=token.get("refresh_token"),
-                scope=scope
-            )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
-            )
+        data = {**self._token_request_data, "code": code, "code_verifier": code_verifier}
+        return self._token_response(self._request_token(data))
     
     def refresh_token(self, refresh_token: str) -> OAuthTokenResponse:
         """
@@ -147,57 +161,87 @@ class TwitterOAuthService(BaseOAuthService):
             OAuthTokenResponse: The new OAuth token.
         """
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_twitter_client_id" or not self.config["client_id"]:
+        if self._use_mock:
             return self._get_mock_token()
         
-        try:
-            # Create OAuth2Session with current token
-            twitter = OAuth2Session(
-                self.config["client_id"],
-                token={"refresh_token": refresh_token}
-            )
+        data = {**self._refresh_request_data, "refresh_token": refresh_token}
+        # Reuse the refresh token if Twitter does not return a new one
+        return self._token_response(self._request_token(data), refresh_token)
+    
+    @staticmethod
+    def _token_response(token: Dict, refresh_token: Optional[str] = None) -> OAuthTokenResponse:
+        """
+        Build a token response from Twitter's token endpoint body.
+        
+        Args:
+            token: The decoded token response.
+            refresh_token: The refresh token to keep if none is returned.
             
-            # Refresh the token
-            token = twitter.refresh_token(
-                self.config["token_url"],
-                refresh_token=refresh_token,
-                client_id=self.config["client_id"],
-                client_secret=self.config["client_secret"]
-            )
+        Returns:
+            OAuthTokenResponse: The OAuth token.
             
-            # Convert to OAuthTokenResponse
+        Raises:
+            HTTPException: If the body is not a valid token response.
+        """
+        try:
             # Handle scope being a list by joining it with spaces if needed
             scope = token.get("scope")
             if isinstance(scope, list):
                 scope = " ".join(scope)
-                
+            
             return OAuthTokenResponse(
                 access_token=token["access_token"],
                 token_type=token["token_type"],
                 expires_in=token.get("expires_in", 7200),
-                refresh_token=token.get("refresh_token", refresh_token),  # Reuse if not returned
+                refresh_token=token.get("refresh_token", refresh_token),
                 scope=scope
             )
-        except (InvalidGrantError, TokenExpiredError, Exception) as e:
+        except (AttributeError, KeyError, ValueError, ValidationError) as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
+                detail={"error": "invalid_token_response", "error_description": str(e)}
             )
     
-    def get_oauth_session(self, token_dict: Dict) -> OAuth2Session:
+    def _request_token(self, data: Dict) -> Dict:
         """
-        Get an OAuth2Session with the provided token.
+        POST a token request to Twitter, authenticating with the client credentials.
         
         Args:
-            token_dict: The token dictionary.
+            data: The token request form data.
             
         Returns:
-            OAuth2Session: The OAuth2Session.
+            Dict: The token response.
+            
+        Raises:
+            HTTPException: If the request fails or Twitter rejects it.
         """
-        return OAuth2Session(
-            self.config["client_id"],
-            token=token_dict
-        )
+        try:
+            response = self._request(
+                "POST",
+                self.config["token_url"],
+                data=data,
+                auth=self._client_auth
+            )
+        except requests.RequestException as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        if response.status_code != 200:
+            _, error_data = self.handle_request_error(response)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_data
+            )
+        
+        try:
+            return self._parse_json(response)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
     def get_user_info(self, access_token: str) -> UserInfo:
         """
@@ -210,27 +254,27 @@ class TwitterOAuthService(BaseOAuthService):
             UserInfo: The user information.
         """
         # If using placeholder credentials, return mock data
-        if self.config["client_id"] == "your_twitter_client_id" or not self.config["client_id"]:
+        if self._use_mock:
             return self._get_mock_user_info()
         
-        try:
-            # Create OAuth2Session with access token
-            token = {"access_token": access_token, "token_type": "Bearer"}
-            twitter = self.get_oauth_session(token)
-            
-            # Get user info
-            response = twitter.get(
-                self.config["api_base_url"],
-                params={"user.fields": "id,name,username,profile_image_url"}
+        # Get user info over the shared session; network errors propagate so
+        # callers can tell an unavailable provider from a rejected token
+        response = self._request(
+            "GET",
+            self.config["api_base_url"],
+            params={"user.fields": "id,name,username,profile_image_url"},
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        
+        if response.status_code != 200:
+            status_code, error_data = self.handle_request_error(response)
+            raise HTTPException(
+                status_code=status_code,
+                detail=error_data
             )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=response.json() if response.content else {"error": "Unknown error"}
-                )
-            
-            user_data = response.json().get("data", {})
+        
+        try:
+            user_data = self._parse_json(response).get("data", {})
             
             return UserInfo(
                 id=user_data["id"],
@@ -240,7 +284,7 @@ class TwitterOAuthService(BaseOAuthService):
                 avatar_url=user_data.get("profile_image_url"),
                 raw_data=user_data
             )
-        except Exception as e:
+        except (KeyError, ValueError) as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
@@ -253,31 +297,21 @@ class TwitterOAuthService(BaseOAuthService):
         Returns:
             OAuthTokenResponse: A mock OAuth token.
         """
-        return OAuthTokenResponse(
-            access_token=f"mock_twitter_access_token_{int(time.time())}",
+        now = int(time.time())
+        return OAuthTokenResponse.model_construct(
+            access_token=f"mock_twitter_access_token_{now}",
             token_type="Bearer",
             expires_in=7200,
-            refresh_token=f"mock_twitter_refresh_token_{int(time.time())}",
+            refresh_token=f"mock_twitter_refresh_token_{now}",
             scope="tweet.read users.read offline.access"
         )
     
     def _get_mock_user_info(self) -> UserInfo:
         """
-        Generate mock user information for testing purposes.
+        Get the mock user information used with placeholder credentials.
         
         Returns:
-            UserInfo: Mock user information.
+            UserInfo: A copy of the mock user information, so callers can't
+                change the shared constant.
         """
-        return UserInfo(
-            id="1234567890",
-            username="mock_twitter_user",
-            email=None,
-            profile_url="https://twitter.com/mock_twitter_user",
-            avatar_url="https://pbs.twimg.com/profile_images/mock_image.jpg",
-            raw_data={
-                "id": "1234567890",
-                "name": "Mock Twitter User",
-                "username": "mock_twitter_user",
-                "profile_image_url": "https://pbs.twimg.com/profile_images/mock_image.jpg"
-            }
-        ) 
\ No newline at end of file
+        return _MOCK_USER_INFO.model_copy(deep=True)
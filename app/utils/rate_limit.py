@@ -0,0 +1,50 @@
+"""
+Rate limiting utilities.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for smoothing outbound request rates.
+    
+    Each acquire() reserves one token and returns how long the caller should
+    wait before using it, so concurrent callers queue in arrival order instead
+    of retrying.
+    """
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        """
+        Initialize the token bucket, starting full.
+        
+        Args:
+            capacity: Maximum number of tokens, i.e. the allowed burst size.
+            refill_rate: Tokens added per second.
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, max_wait: float = float("inf")) -> float:
+        """
+        Reserve a token, unless that would mean waiting longer than max_wait.
+        
+        Args:
+            max_wait: Longest acceptable wait in seconds.
+            
+        Returns:
+            float: Seconds to wait before the reserved token is available (0 if
+                one is available now). A value above max_wait means no token was
+                reserved; it is how long the caller would have had to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+            self._updated = now
+            delay = max(0.0, (1 - self._tokens) / self.refill_rate)
+            if delay <= max_wait:
+                self._tokens -= 1
+            return delay
@@ -39,5 +39,6 @@ def is_token_expired(expires_at: int, buffer_seconds: int = 300) -> bool:
     Returns:
         bool: True if the token is expired or about to expire, False otherwise.
     """
-    current_time = get_current_timestamp()
-    return current_time >= (expires_at - buffer_seconds) 
\ No newline at end of file
+    # Compare against the float clock directly: for an integer deadline this is
+    # equivalent to truncating the current time first
+    return time.time() >= expires_at - buffer_seconds 
\ No newline at end of file
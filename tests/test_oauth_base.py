@@ -0,0 +1,258 @@
+"""
+Tests for the shared OAuth service behaviour.
+"""
+import threading
+import time
+
+import orjson
+import pytest
+import requests
+from fastapi import HTTPException
+
+from app.models.oauth import OAuthTokenResponse, UserInfo
+from app.services.providers.google import GoogleOAuthService
+from app.services.providers.sketchfab import SketchfabOAuthService
+
+
+def _token(expires_in=3600, refresh_token="new_refresh"):
+    return OAuthTokenResponse(
+        access_token="new_access",
+        token_type="Bearer",
+        expires_in=expires_in,
+        refresh_token=refresh_token
+    )
+
+
+class FakeProvider:
+    """Stands in for Sketchfab's refresh and user info calls."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.result = _token()
+        self.user_info = UserInfo(id="1", username="user")
+    
+    def refresh_token(self, refresh_token):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+    
+    def get_user_info(self, access_token):
+        self.calls += 1
+        if isinstance(self.user_info, Exception):
+            raise self.user_info
+        return self.user_info
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setattr(SketchfabOAuthService, "refresh_token", provider.refresh_token)
+    monkeypatch.setattr(SketchfabOAuthService, "get_user_info", provider.get_user_info)
+    return provider
+
+
+@pytest.fixture
+def service(provider):
+    return SketchfabOAuthService()
+
+
+def _refresh_concurrently(service, provider, followers=4):
+    """Run one leading refresh and several that arrive while it is in flight."""
+    results = []
+    
+    def refresh():
+        try:
+            results.append(service.refresh_token_coalesced("old_refresh"))
+        except Exception as e:
+            results.append(e)
+    
+    provider.release.clear()
+    threads = [threading.Thread(target=refresh)]
+    threads[0].start()
+    assert provider.started.wait(5)
+    
+    threads += [threading.Thread(target=refresh) for _ in range(followers)]
+    for thread in threads[1:]:
+        thread.start()
+    # Give the followers time to attach to the leader's refresh
+    time.sleep(0.1)
+    provider.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_refreshes_share_one_provider_call(service, provider):
+    results = _refresh_concurrently(service, provider)
+    
+    assert provider.calls == 1
+    assert len(results) == 5
+    assert all(result is provider.result for result in results)
+
+
+def test_leader_failure_reaches_every_follower_as_its_own_exception(service, provider):
+    provider.result = HTTPException(status_code=503, detail="down")
+    
+    results = _refresh_concurrently(service, provider)
+    
+    assert provider.calls == 1
+    assert all(isinstance(result, HTTPException) and result.status_code == 503 for result in results)
+    assert len({id(result) for result in results}) == 5
+
+
+def test_follower_copies_keep_network_errors_intact(service, provider):
+    provider.result = requests.ConnectionError("provider unreachable")
+    
+    results = _refresh_concurrently(service, provider, followers=2)
+    
+    assert [type(result) for result in results] == [requests.ConnectionError] * 3
+    assert [str(result) for result in results] == ["provider unreachable"] * 3
+
+
+def test_failed_refresh_is_not_reused(service, provider):
+    provider.result = HTTPException(status_code=503, detail="down")
+    with pytest.raises(HTTPException):
+        service.refresh_token_coalesced("old_refresh")
+    
+    provider.result = _token()
+    assert service.refresh_token_coalesced("old_refresh") is provider.result
+    assert provider.calls == 2
+
+
+def test_recent_refresh_result_is_reused(service, provider):
+    first = service.refresh_token_coalesced("old_refresh")
+    
+    assert service.refresh_token_coalesced("old_refresh") is first
+    assert provider.calls == 1
+
+
+@pytest.mark.parametrize("expires_in, lifetime", [
+    (3600, 30),  # capped at REFRESH_RESULT_CACHE_TTL
+    (75, 15),    # never past the token's own refresh point
+    (60, 0),
+    (30, -30),   # already due for refresh, so never reused
+])
+def test_refresh_result_expiry_is_clamped(service, expires_in, lifetime):
+    assert service._refresh_result_expiry(b"key", _token(expires_in), 1000.0) == 1000.0 + lifetime
+
+
+def test_short_lived_refresh_result_is_not_reused(service, provider):
+    provider.result = _token(expires_in=30)
+    service.refresh_token_coalesced("old_refresh")
+    service.refresh_token_coalesced("old_refresh")
+    
+    assert provider.calls == 2
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 502, 503, 504])
+def test_stale_user_info_is_served_on_provider_outage(service, provider, status_code):
+    cached = service.get_user_info_cached("access")
+    service._user_info_cache.clear()
+    
+    provider.user_info = HTTPException(status_code=status_code, detail="unavailable")
+    assert service.get_user_info_cached("access") is cached
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 403, 404])
+def test_user_info_client_errors_are_raised_despite_stale_copy(service, provider, status_code):
+    service.get_user_info_cached("access")
+    service._user_info_cache.clear()
+    
+    provider.user_info = HTTPException(status_code=status_code, detail="rejected")
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info_cached("access")
+    assert exc_info.value.status_code == status_code
+
+
+def test_outage_without_stale_copy_is_raised(service, provider):
+    provider.user_info = HTTPException(status_code=503, detail="unavailable")
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info_cached("access")
+    assert exc_info.value.status_code == 503
+
+
+def test_network_error_without_stale_copy_is_a_bad_gateway(service, provider):
+    provider.user_info = requests.ConnectionError("provider unreachable")
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info_cached("access")
+    assert exc_info.value.status_code == 502
+    assert exc_info.value.detail["error"] == "temporarily_unavailable"
+
+
+def _response(status_code, body, content_type="application/json"):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body if isinstance(body, bytes) else orjson.dumps(body)
+    response.headers["content-type"] = content_type
+    return response
+
+
+@pytest.fixture
+def google(monkeypatch):
+    """A live-mode Google service whose API calls return the queued replies."""
+    replies = []
+    
+    def request(self, method, url, **kwargs):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    
+    monkeypatch.setattr(GoogleOAuthService, "_request", request)
+    service = GoogleOAuthService()
+    service._use_mock = False
+    return service, replies
+
+
+@pytest.mark.parametrize("reply", [
+    _response(401, {"error": "invalid_token"}),
+    _response(503, {"error": "backendError"}),
+    _response(502, b"<html>Bad Gateway</html>", content_type="text/html"),
+])
+def test_google_user_info_keeps_the_upstream_status(google, reply):
+    service, replies = google
+    replies.append(reply)
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info("token")
+    assert exc_info.value.status_code == reply.status_code
+
+
+@pytest.mark.parametrize("failure", [
+    _response(503, {"error": "backendError"}),
+    requests.ConnectionError("unreachable"),
+])
+def test_google_cached_user_info_falls_back_to_stale(google, failure):
+    service, replies = google
+    replies.append(_response(200, {"id": "7", "name": "Google User"}))
+    assert service.get_user_info_cached("token").id == "7"
+    
+    service._user_info_cache.clear()
+    replies.append(failure)
+    assert service.get_user_info_cached("token").id == "7"
+
+
+def test_google_user_info_is_validated(google):
+    service, replies = google
+    replies.append(_response(200, {"id": 7, "name": None}))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info("token")
+    assert exc_info.value.status_code == 500
+
+
+def test_empty_error_body_has_the_unknown_error_shape(google):
+    service, replies = google
+    replies.append(_response(503, b""))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info("token")
+    assert exc_info.value.detail == {"error": "unknown_error", "error_description": "Empty response body"}
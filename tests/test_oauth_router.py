@@ -0,0 +1,107 @@
+"""
+Tests for the OAuth router.
+"""
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.oauth import OAuthTokenResponse
+from app.services.oauth_factory import create_oauth_service
+from app.services.providers.twitter import TwitterOAuthService
+
+
+@pytest.fixture
+def twitter(monkeypatch):
+    """Live-mode Twitter service whose token requests are recorded, not sent."""
+    service = create_oauth_service("twitter")
+    monkeypatch.setattr(service, "_use_mock", False)
+    requests = []
+    
+    def request_token(self, data):
+        requests.append(data)
+        raise HTTPException(status_code=400, detail="stubbed")
+    
+    monkeypatch.setattr(TwitterOAuthService, "_request_token", request_token)
+    return requests
+
+
+def _authorize(client):
+    response = client.get("/api/oauth/authorize/twitter", follow_redirects=False)
+    assert response.status_code == 307
+    return re.search(r"[?&]state=([^&]+)", response.headers["location"]).group(1)
+
+
+def test_pkce_verifier_comes_from_the_session_once(twitter):
+    client = TestClient(app)
+    state = _authorize(client)
+    
+    client.get(f"/api/oauth/callback/twitter?code=abc&state={state}")
+    assert len(twitter) == 1
+    assert len(twitter[0]["code_verifier"]) == 43
+    
+    # A replayed callback finds no verifier and never reaches Twitter
+    response = client.get(f"/api/oauth/callback/twitter?code=abc&state={state}")
+    assert response.status_code == 400
+    assert "Missing code_verifier" in response.text
+    assert len(twitter) == 1
+
+
+def test_pkce_verifier_is_not_available_to_other_sessions(twitter):
+    state = _authorize(TestClient(app))
+    
+    response = TestClient(app).get(f"/api/oauth/callback/twitter?code=abc&state={state}")
+    assert response.status_code == 400
+    assert twitter == []
+
+
+def test_pkce_verifiers_differ_per_flow(twitter):
+    client = TestClient(app)
+    states = [_authorize(client) for _ in range(2)]
+    
+    for state in states:
+        client.get(f"/api/oauth/callback/twitter?code=abc&state={state}")
+    assert len({data["code_verifier"] for data in twitter}) == 2
+
+
+def test_importing_the_app_loads_no_provider_module():
+    code = (
+        "import sys, app.main; "
+        "print([m for m in sys.modules if m.startswith('app.services.providers.')])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_refresh_requires_the_stored_refresh_token():
+    service = create_oauth_service("sketchfab")
+    service.store_token("refresh_user", OAuthTokenResponse(
+        access_token="at1",
+        token_type="Bearer",
+        expires_in=3600,
+        refresh_token="rt1"
+    ))
+    client = TestClient(app)
+    
+    response = client.post("/api/oauth/refresh/sketchfab", json={"user_id": "refresh_user", "refresh_token": "rt1"})
+    assert response.status_code == 200
+    assert service.get_token("refresh_user").refresh_token == response.json()["refresh_token"] != "rt1"
+    
+    # The used refresh token is not answered again from the recent results
+    response = client.post("/api/oauth/refresh/sketchfab", json={"user_id": "refresh_user", "refresh_token": "rt1"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["error"] == "invalid_grant"
+    
+    response = client.post("/api/oauth/refresh/sketchfab", json={"user_id": "someone_else", "refresh_token": "rt1"})
+    assert response.status_code == 404
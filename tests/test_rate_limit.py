@@ -0,0 +1,71 @@
+"""
+Tests for the client-side rate limiting of provider calls.
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.config.settings import get_settings
+from app.services.providers.sketchfab import SketchfabOAuthService
+from app.utils import rate_limit
+from app.utils.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen monotonic clock, advanced by assigning ``clock.now``."""
+    class Clock:
+        now = 1000.0
+    
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: Clock.now))
+    return Clock
+
+
+def test_bucket_allows_a_burst_then_spaces_calls(clock):
+    bucket = TokenBucket(capacity=3, refill_rate=2)
+    
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Later callers queue behind each other, half a second apart
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(capacity=2, refill_rate=1)
+    bucket.acquire()
+    bucket.acquire()
+    
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_bucket_does_not_reserve_beyond_max_wait(clock):
+    bucket = TokenBucket(capacity=1, refill_rate=0.5)
+    bucket.acquire()
+    
+    assert bucket.acquire(max_wait=1.0) == pytest.approx(2.0)
+    # The refused call left the queue untouched
+    assert bucket.acquire() == pytest.approx(2.0)
+
+
+def test_service_limit_comes_from_settings(monkeypatch):
+    assert SketchfabOAuthService()._rate_limiter is None
+    
+    monkeypatch.setattr(get_settings(), "sketchfab_rate_limit", 90)
+    limiter = SketchfabOAuthService()._rate_limiter
+    assert limiter.capacity == 90
+    assert limiter.refill_rate == pytest.approx(0.1)
+
+
+def test_service_fails_fast_once_the_wait_exceeds_the_cap(monkeypatch, clock):
+    monkeypatch.setattr(SketchfabOAuthService, "RATE_LIMIT_MAX_WAIT", 0.5)
+    service = SketchfabOAuthService()
+    service._rate_limiter = TokenBucket(capacity=1, refill_rate=1 / 900)
+    service._rate_limiter.acquire()
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service._request("GET", "https://sketchfab.invalid/")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "900"}
@@ -0,0 +1,118 @@
+"""
+Tests for the Twitter OAuth service.
+"""
+import orjson
+import pytest
+import requests
+from fastapi import HTTPException
+
+from app.services.providers.twitter import TwitterOAuthService
+
+USER = {"id": "42", "name": "Test User", "username": "test_user"}
+
+
+def _response(status_code, body):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = orjson.dumps(body)
+    response.headers["content-type"] = "application/json"
+    return response
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Responses (or exceptions) returned by the next Twitter API calls."""
+    replies = []
+    
+    def request(self, method, url, **kwargs):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    
+    monkeypatch.setattr(TwitterOAuthService, "_request", request)
+    return replies
+
+
+@pytest.fixture
+def service(replies):
+    service = TwitterOAuthService()
+    service._use_mock = False
+    return service
+
+
+def test_get_user_info_keeps_the_upstream_status(service, replies):
+    replies.append(_response(503, {"title": "Service Unavailable"}))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info("token")
+    assert exc_info.value.status_code == 503
+
+
+def test_get_user_info_lets_network_errors_through(service, replies):
+    replies.append(requests.ConnectionError("unreachable"))
+    
+    with pytest.raises(requests.ConnectionError):
+        service.get_user_info("token")
+
+
+@pytest.mark.parametrize("failure", [
+    _response(503, {"title": "Service Unavailable"}),
+    _response(429, {"title": "Too Many Requests"}),
+    requests.ConnectionError("unreachable"),
+])
+def test_cached_user_info_falls_back_to_stale_while_twitter_is_down(service, replies, failure):
+    replies.append(_response(200, {"data": USER}))
+    assert service.get_user_info_cached("token").id == "42"
+    
+    # Expire the fresh entry; the stale copy remains
+    service._user_info_cache.clear()
+    replies.append(failure)
+    assert service.get_user_info_cached("token").id == "42"
+
+
+def test_cached_user_info_raises_when_twitter_rejects_the_token(service, replies):
+    replies.append(_response(200, {"data": USER}))
+    service.get_user_info_cached("token")
+    
+    service._user_info_cache.clear()
+    replies.append(_response(401, {"title": "Unauthorized"}))
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_user_info_cached("token")
+    assert exc_info.value.status_code == 401
+
+
+def test_authorization_url_without_verifier_is_refused(service):
+    with pytest.raises(NotImplementedError):
+        service.get_authorization_url()
+    
+    url, state, verifier = service.start_authorization()
+    assert f"state={state}" in url and verifier
+
+
+@pytest.mark.parametrize("body", [
+    {"token_type": "bearer"},
+    {"access_token": "token", "token_type": "bearer", "expires_in": "soon"},
+    [],
+])
+def test_malformed_token_response_is_a_bad_request(service, replies, body):
+    replies.append(_response(200, body))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        service.refresh_token("refresh")
+    assert exc_info.value.status_code == 400
+
+
+def test_refresh_keeps_the_refresh_token_when_none_is_returned(service, replies):
+    replies.append(_response(200, {"access_token": "new", "token_type": "bearer", "expires_in": 7200}))
+    
+    assert service.refresh_token("refresh").refresh_token == "refresh"
+
+
+def test_mock_user_info_is_a_fresh_copy():
+    service = TwitterOAuthService()
+    service._use_mock = True
+    
+    first = service.get_user_info("token")
+    first.raw_data["name"] = "changed"
+    assert service.get_user_info("token").raw_data["name"] != "changed"